@@ -1,7 +1,7 @@
 """
 setup/04_workflows.py
 Registers all 5 SupportIQ Elastic Workflows via the Kibana Workflows API.
-Also registers the 9 custom ES|QL tools with each agent.
+Also registers the 10 custom ES|QL tools with each agent.
 
 Workflows registered:
   1. supportiq_ticket_intake   — webhook intake trigger
@@ -16,8 +16,13 @@ Usage:
 
 import os
 import sys
+import gzip
 import json
 import requests
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 # Allow imports from project root
@@ -38,48 +43,74 @@ SLACK_ENGINEERING_CHANNEL = os.getenv("SLACK_ENGINEERING_CHANNEL", "#engineering
 CRM_API_URL = os.getenv("CRM_API_URL", "https://crm.example.com/api/v1")
 CRM_API_KEY = os.getenv("CRM_API_KEY", "placeholder")
 
-KIBANA_HEADERS = {
+KIBANA_HEADERS = MappingProxyType({
     "Content-Type": "application/json",
     "Authorization": f"ApiKey {KIBANA_API_KEY}",
     "kbn-xsrf": "true",
-}
+})
 
-ES_HEADERS = {
+ES_HEADERS = MappingProxyType({
     "Content-Type": "application/json",
     "Authorization": f"ApiKey {ELASTIC_API_KEY}",
-}
+})
+
+# Request bodies above this size are gzip-compressed before they go on the wire
+GZIP_MIN_BYTES = 1024
+
+# Every registration call is an independent round-trip to Kibana, so they are
+# fanned out over a thread pool and share one keep-alive session.
+MAX_WORKERS = 16
+
+SESSION = requests.Session()
+SESSION.headers.update(KIBANA_HEADERS)
+SESSION.headers["Accept-Encoding"] = "gzip"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+))
 
 # ── Agent → Tool mapping ───────────────────────────────────────────────────
 # These match the tool names used in 03_agents.py system prompts.
 # Agent Builder resolves tool names to registered ES|QL / Workflow tools.
 
-AGENT_TOOL_ASSIGNMENTS = {
-    "supportiq_watcher": [
+AGENT_TOOL_ASSIGNMENTS = MappingProxyType({
+    "supportiq_watcher": (
         "find_similar_tickets",
         "get_customer_profile",
-    ],
-    "supportiq_judge": [
+    ),
+    "supportiq_judge": (
         "score_ticket_priority",
         "detect_ticket_surge",
         "correlate_spike_to_deployment",
-    ],
-    "supportiq_solver": [
+    ),
+    "supportiq_solver": (
         "search_knowledge_base",
-    ],
-    "supportiq_critic": [
+        "fetch_article_content",
+    ),
+    "supportiq_critic": (
         "score_resolution_quality",
-    ],
-    "supportiq_analyst": [
+    ),
+    "supportiq_analyst": (
         "weekly_performance_metrics",
         "kb_gap_detector",
         "detect_ticket_surge",
         "correlate_spike_to_deployment",
-    ],
-}
+    ),
+    "supportiq_watcher_judge": (
+        "find_similar_tickets",
+        "get_customer_profile",
+        "score_ticket_priority",
+        "detect_ticket_surge",
+        "correlate_spike_to_deployment",
+    ),
+})
 
 # ── Workflow Definitions ────────────────────────────────────────────────────
+# Module-level definitions are read-only: a tuple of workflows and a frozen
+# agent → tools mapping, so the pre-serialized bodies below can never go stale.
 
-WORKFLOWS = [
+WORKFLOWS = (
     {
         "id": "supportiq_ticket_intake",
         "name": "SupportIQ: Ticket Intake",
@@ -91,10 +122,13 @@ WORKFLOWS = [
                 "type": "elasticsearch",
                 "action": "index",
                 "index": "support-tickets",
+                "document_id": "{{ctx.body.ticket_id}}",   # pipeline updates tickets by _id
+                # Evaluate now() once per step so every timestamp field in the document agrees
+                "variables": {"ts": "{{now()}}"},
                 "document_template": {
                     "ticket_id": "{{ctx.body.ticket_id}}",
-                    "created_at": "{{now()}}",
-                    "updated_at": "{{now()}}",
+                    "created_at": "{{ts}}",
+                    "updated_at": "{{ts}}",
                     "status": "open",
                     "title": "{{ctx.body.title}}",
                     "description": "{{ctx.body.description}}",
@@ -127,11 +161,12 @@ WORKFLOWS = [
                 "action": "update_by_query",
                 "index": "support-tickets",
                 "query": {"term": {"ticket_id": "{{ctx.body.ticket_id}}"}},
+                "variables": {"ts": "{{now()}}"},
                 "update": {
                     "status": "resolved",
                     "resolution_final": "{{ctx.body.resolution_text}}",
                     "resolved_by": "{{ctx.body.resolved_by}}",
-                    "updated_at": "{{now()}}",
+                    "updated_at": "{{ts}}",
                 },
             },
             {
@@ -200,9 +235,10 @@ WORKFLOWS = [
                 "type": "elasticsearch",
                 "action": "index",
                 "index": "agent-traces",
+                "variables": {"ts": "{{now()}}"},
                 "document_template": {
-                    "trace_id": "ghost-{{ctx.body.category}}-{{now()}}",
-                    "timestamp": "{{now()}}",
+                    "trace_id": "ghost-{{ctx.body.category}}-{{ts}}",
+                    "timestamp": "{{ts}}",
                     "agent_name": "analyst",
                     "action": "ghost_ticket_alert",
                     "decision": "pre_emptive_alert",
@@ -222,10 +258,11 @@ WORKFLOWS = [
                 "type": "elasticsearch",
                 "action": "index",
                 "index": "knowledge-base",
+                "variables": {"ts": "{{now()}}"},
                 "document_template": {
-                    "article_id": "DRAFT-{{ctx.body.category}}-{{now()}}",
-                    "created_at": "{{now()}}",
-                    "updated_at": "{{now()}}",
+                    "article_id": "DRAFT-{{ctx.body.category}}-{{ts}}",
+                    "created_at": "{{ts}}",
+                    "updated_at": "{{ts}}",
                     "category": "{{ctx.body.category}}",
                     "title": "{{ctx.body.title}}",
                     "content": "{{ctx.body.content}}",
@@ -260,10 +297,11 @@ WORKFLOWS = [
                 "type": "elasticsearch",
                 "action": "index",
                 "index": "feedback",
+                "variables": {"ts": "{{now()}}"},
                 "document_template": {
-                    "feedback_id": "FB-{{ctx.body.ticket_id}}-{{now()}}",
+                    "feedback_id": "FB-{{ctx.body.ticket_id}}-{{ts}}",
                     "ticket_id": "{{ctx.body.ticket_id}}",
-                    "timestamp": "{{now()}}",
+                    "timestamp": "{{ts}}",
                     "score": "{{ctx.body.score}}",
                     "agent_id": "{{ctx.body.slack_user_id}}",
                     "channel": "slack",
@@ -283,74 +321,106 @@ WORKFLOWS = [
             },
         ],
     },
-]
+)
+
+
+def _gzip_body(body: bytes) -> dict:
+    """Request kwargs for a JSON body — gzipped with Content-Encoding when large."""
+    if len(body) > GZIP_MIN_BYTES:
+        return {"data": gzip.compress(body, compresslevel=5), "headers": {"Content-Encoding": "gzip"}}
+    return {"data": body}
 
 
-def register_workflow(workflow: dict):
-    """Register a single workflow via the Kibana Workflows API."""
-    wf_id = workflow["id"]
+# Workflow bodies are static — encode each one once instead of on every request/retry
+WORKFLOW_BODIES = {wf["id"]: _gzip_body(json.dumps(wf).encode()) for wf in WORKFLOWS}
+
+
+def register_workflow(wf_id: str, body: dict):
+    """Register a single pre-serialized workflow (request kwargs from _gzip_body)."""
     url = f"{KIBANA_URL}/api/workflows/{wf_id}"
 
-    check = requests.get(url, headers=KIBANA_HEADERS)
-    if check.status_code == 200:
-        print(f"  ⚠️  Workflow '{wf_id}' already exists. Updating...")
-        resp = requests.put(url, headers=KIBANA_HEADERS, json=workflow)
-    else:
-        resp = requests.post(f"{KIBANA_URL}/api/workflows", headers=KIBANA_HEADERS, json=workflow)
+    # PUT is an upsert; only fall back to POST when the resource route is unknown
+    resp = SESSION.put(url, **body)
+    if resp.status_code in (404, 405):
+        resp = SESSION.post(f"{KIBANA_URL}/api/workflows", **body)
 
     if resp.status_code in (200, 201):
         print(f"  ✅  Workflow '{wf_id}' registered.")
     else:
-        print(f"  ❌  Failed '{wf_id}': {resp.status_code} — {resp.text[:200]}")
+        print(f"  ❌  Failed '{wf_id}': {resp.status_code} — {resp.content[:200].decode('utf-8', 'replace')}")
+
+
+def _tool_payload(tool_def: dict) -> dict:
+    """Map an esql_tools definition to the Agent Builder tools API schema."""
+    return {
+        "id": tool_def["name"],
+        "name": tool_def["name"],
+        "description": tool_def["description"],
+        "parameters": tool_def["parameters"],
+        "type": "esql",          # custom ES|QL backed tool
+        "elastic_url": ELASTIC_URL,
+    }
 
 
 def register_esql_tools():
     """
-    Register the 9 custom ES|QL tools with Elastic Agent Builder.
+    Register the 10 custom ES|QL tools with Elastic Agent Builder.
     Tools are defined in tools/esql_tools.py and exposed here via the
     Kibana Agent Builder tools API.
+
+    All tools are submitted in one bulk request first; if the deployment has
+    no bulk endpoint, each tool is upserted individually (concurrently).
+    Returns the number of tools submitted.
     """
     from tools.esql_tools import ALL_TOOLS
 
-    print(f"\n  Registering {len(ALL_TOOLS)} custom ES|QL tools...")
-    for tool_def in ALL_TOOLS:
-        tool_id = tool_def["name"]
+    payloads = [_tool_payload(t) for t in ALL_TOOLS]
+
+    def register_tool(payload: dict):
+        tool_id = payload["id"]
         url = f"{KIBANA_URL}/api/agent_builder/tools/{tool_id}"
 
-        payload = {
-            "name": tool_def["name"],
-            "description": tool_def["description"],
-            "parameters": tool_def["parameters"],
-            "type": "esql",          # custom ES|QL backed tool
-            "elastic_url": ELASTIC_URL,
-        }
-
-        check = requests.get(url, headers=KIBANA_HEADERS)
-        if check.status_code == 200:
-            resp = requests.put(url, headers=KIBANA_HEADERS, json=payload)
-        else:
-            resp = requests.post(
+        resp = SESSION.put(url, **_gzip_body(json.dumps({k: v for k, v in payload.items() if k != "id"}).encode()))
+        if resp.status_code in (404, 405):
+            resp = SESSION.post(
                 f"{KIBANA_URL}/api/agent_builder/tools",
-                headers=KIBANA_HEADERS,
-                json={"id": tool_id, **payload},
+                **_gzip_body(json.dumps(payload).encode()),
             )
 
         icon = "✅" if resp.status_code in (200, 201) else "⚠️ "
         print(f"    {icon} Tool: {tool_id}")
 
+    print(f"\n  Registering {len(ALL_TOOLS)} custom ES|QL tools...")
+    resp = SESSION.post(
+        f"{KIBANA_URL}/api/agent_builder/tools/_bulk",
+        **_gzip_body(json.dumps({"tools": payloads}).encode()),
+    )
+    if resp.status_code in (200, 201):
+        for payload in payloads:
+            print(f"    ✅ Tool: {payload['id']}")
+        return len(ALL_TOOLS)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(register_tool, payloads))
+    return len(ALL_TOOLS)
+
 
 def assign_tools_to_agents():
     """
     Assign the correct subset of tools to each agent.
     Each agent only sees the tools it needs — keeps context windows clean.
     """
-    print("\n  Assigning tools to agents...")
-    for agent_id, tool_names in AGENT_TOOL_ASSIGNMENTS.items():
+    def assign(item: tuple):
+        agent_id, tool_names = item
         url = f"{KIBANA_URL}/api/agent_builder/agents/{agent_id}/tools"
-        resp = requests.put(url, headers=KIBANA_HEADERS, json={"tools": tool_names})
+        resp = SESSION.put(url, json={"tools": tool_names})
         icon = "✅" if resp.status_code in (200, 201, 204) else "⚠️ "
         print(f"    {icon} Agent '{agent_id}': {', '.join(tool_names)}")
 
+    print("\n  Assigning tools to agents...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(assign, AGENT_TOOL_ASSIGNMENTS.items()))
+
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -358,12 +428,13 @@ if __name__ == "__main__":
     print("=" * 60)
 
     print(f"\n📋 Registering {len(WORKFLOWS)} Elastic Workflows...")
-    for wf in WORKFLOWS:
-        register_workflow(wf)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(register_workflow, WORKFLOW_BODIES.keys(), WORKFLOW_BODIES.values()))
 
     print("\n🔧 Registering ES|QL Tools with Agent Builder...")
+    tool_count = 0
     try:
-        register_esql_tools()
+        tool_count = register_esql_tools()
     except ImportError as e:
         print(f"  ⚠️  Could not import esql_tools: {e}")
         print("     Ensure PYTHONPATH includes the project root.")
@@ -373,5 +444,5 @@ if __name__ == "__main__":
 
     print("\n✅  Step 4 complete.")
     print("    Workflows : " + " | ".join(w["id"] for w in WORKFLOWS))
-    print("    Tools     : 9 ES|QL tools registered")
+    print(f"    Tools     : {tool_count} ES|QL tools registered")
     print("    Agents    : Tools scoped per agent")
@@ -9,11 +9,20 @@ The A2A protocol has two key endpoints per agent:
 """
 
 import os
+import re
+import gzip
 import json
-import uuid
+import secrets
 import time
+import asyncio
+import hashlib
+import threading
+import httpx
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,6 +35,26 @@ HEADERS = {
     "Authorization": f"ApiKey {KIBANA_API_KEY}",
 }
 
+# Matches a ```json ... ``` (or bare ```) fenced block anywhere in an agent reply
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Shared decoder — raw_decode() parses the leading JSON value and stops, so a
+# reply with trailing prose after the object still parses in a single pass
+_DECODER = json.JSONDecoder()
+
+# Agent cards change rarely — persist them across CLI runs and revalidate with ETags
+AGENT_CARD_CACHE_PATH = os.getenv(
+    "AGENT_CARD_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "supportiq", "agent_cards.json"),
+)
+AGENT_CARD_CACHE_TTL = int(os.getenv("AGENT_CARD_CACHE_TTL", "3600"))
+
+# Request bodies above this size are gzip-compressed before they go on the wire
+GZIP_MIN_BYTES = 1024
+
+# Opt-in fused Watcher+Judge agent — same flag as the pipeline's
+FUSED_WATCHER_JUDGE = os.getenv("FUSED_WATCHER_JUDGE", "false").lower() == "true"
+
 # Agent IDs — must match what was created in setup/03_agents.py
 AGENT_IDS = {
     "watcher":  "supportiq_watcher",
@@ -34,6 +63,16 @@ AGENT_IDS = {
     "critic":   "supportiq_critic",
     "analyst":  "supportiq_analyst",
 }
+if FUSED_WATCHER_JUDGE:
+    AGENT_IDS["watcher_judge"] = "supportiq_watcher_judge"
+
+
+def _encode_body(payload: dict) -> tuple:
+    """Serialize a request payload, gzipping it when it is large enough to be worth it."""
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(body) > GZIP_MIN_BYTES:
+        return gzip.compress(body, compresslevel=5), {"Content-Encoding": "gzip"}
+    return body, {}
 
 
 class A2AClient:
@@ -50,6 +89,44 @@ class A2AClient:
             "Authorization": f"ApiKey {self.api_key}",
         }
         self._agent_cards = {}
+        self._async_client = None
+
+        # Agent URLs never change for a client — build them once, not per call
+        base = f"{self.kibana_url}/api/agent_builder/a2a"
+        self._card_urls = {name: f"{base}/{aid}.json" for name, aid in AGENT_IDS.items()}
+        self._send_urls = {name: f"{base}/{aid}" for name, aid in AGENT_IDS.items()}
+        self._disk_cards = None   # loaded lazily from AGENT_CARD_CACHE_PATH
+        self._disk_lock = threading.Lock()
+        self._cache_scope = hashlib.sha256((self.kibana_url or "").encode()).hexdigest()[:16]
+
+        # One pooled keep-alive session per client — avoids a TLS handshake per agent call
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)   # bound once, never passed per call
+        self.session.headers["Accept-Encoding"] = "gzip"
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+        ))
+
+    def warm_up(self, connections: int = 2) -> bool:
+        """
+        Open pooled keep-alive connections to Kibana ahead of the first agent call,
+        so no ticket pays the TCP + TLS handshake. Non-fatal; returns False on failure.
+        The ApiKey header is static, so there is no auth token to refresh.
+        """
+        url = f"{self.kibana_url}/api/status"
+
+        def prime(_):
+            resp = self.session.get(url, timeout=5)
+            resp.close()
+            return resp.ok
+
+        try:
+            with ThreadPoolExecutor(max_workers=connections) as pool:
+                return all(pool.map(prime, range(connections)))
+        except Exception:
+            return False
 
     def get_agent_card(self, agent_name: str) -> dict:
         """
@@ -59,16 +136,23 @@ class A2AClient:
         if agent_name in self._agent_cards:
             return self._agent_cards[agent_name]
 
-        agent_id = AGENT_IDS.get(agent_name)
-        if not agent_id:
-            raise ValueError(f"Unknown agent: {agent_name}. Available: {list(AGENT_IDS.keys())}")
+        try:
+            url = self._card_urls[agent_name]
+        except KeyError:
+            raise ValueError(f"Unknown agent: {agent_name}. Available: {list(AGENT_IDS.keys())}") from None
 
-        url = f"{self.kibana_url}/api/agent_builder/a2a/{agent_id}.json"
-        resp = requests.get(url, headers=self.headers)
-        resp.raise_for_status()
+        card, entry = self._cached_card(agent_name)
+        if card is not None:
+            return card
 
-        card = resp.json()
-        self._agent_cards[agent_name] = card
+        resp = self.session.get(url, headers=self._revalidation_headers(entry))
+        if resp.status_code == 304 and entry:
+            card = entry["card"]
+        else:
+            resp.raise_for_status()
+            card = resp.json()
+
+        self._remember_card(agent_name, card, resp.headers.get("ETag") or (entry or {}).get("etag"))
         return card
 
     def send_message(self, agent_name: str, message: str,
@@ -93,73 +177,209 @@ class A2AClient:
           }
         }
         """
-        agent_id = AGENT_IDS.get(agent_name)
-        if not agent_id:
-            raise ValueError(f"Unknown agent: {agent_name}")
+        try:
+            url = self._send_urls[agent_name]
+        except KeyError:
+            raise ValueError(f"Unknown agent: {agent_name}") from None
+
+        payload = self._build_payload(message, context, session_id)
+
+        start = time.monotonic_ns()
+        body, headers = _encode_body(payload)
+        resp = self.session.post(url, data=body, headers=headers, timeout=timeout)
+
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"A2A call to '{agent_name}' failed: {resp.status_code} — {resp.text}"
+            )
+
+        duration_ms = (time.monotonic_ns() - start) // 1_000_000
+        # Decode straight from the body bytes — skips building resp.text first
+        return self._build_result(agent_name, payload, json.loads(resp.content), duration_ms)
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # ASYNC API — fan out to several agents concurrently over one client
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared AsyncClient. Use it from a single event loop."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers={**self.headers, "Accept-Encoding": "gzip"},
+                timeout=120,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """Close the shared AsyncClient (if one was created)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    async def aget_agent_card(self, agent_name: str) -> dict:
+        """Async variant of get_agent_card()."""
+        if agent_name in self._agent_cards:
+            return self._agent_cards[agent_name]
+
+        try:
+            url = self._card_urls[agent_name]
+        except KeyError:
+            raise ValueError(f"Unknown agent: {agent_name}. Available: {list(AGENT_IDS.keys())}") from None
+
+        card, entry = self._cached_card(agent_name)
+        if card is not None:
+            return card
+
+        resp = await self._get_async_client().get(url, headers=self._revalidation_headers(entry))
+        if resp.status_code == 304 and entry:
+            card = entry["card"]
+        else:
+            resp.raise_for_status()
+            card = resp.json()
+
+        self._remember_card(agent_name, card, resp.headers.get("ETag") or (entry or {}).get("etag"))
+        return card
+
+    async def asend_message(self, agent_name: str, message: str,
+                            context: Optional[dict] = None,
+                            session_id: Optional[str] = None,
+                            timeout: int = 120) -> dict:
+        """Async variant of send_message(). Same envelope, same return shape."""
+        try:
+            url = self._send_urls[agent_name]
+        except KeyError:
+            raise ValueError(f"Unknown agent: {agent_name}") from None
+
+        payload = self._build_payload(message, context, session_id)
+
+        start = time.monotonic_ns()
+        body, headers = _encode_body(payload)
+        resp = await self._get_async_client().post(url, content=body, headers=headers, timeout=timeout)
+
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"A2A call to '{agent_name}' failed: {resp.status_code} — {resp.text}"
+            )
+
+        duration_ms = (time.monotonic_ns() - start) // 1_000_000
+        # Decode straight from the body bytes — skips building resp.text first
+        return self._build_result(agent_name, payload, json.loads(resp.content), duration_ms)
+
+    async def aping_all_agents(self) -> dict:
+        """Async health check: fetch every agent card concurrently."""
+        names = list(AGENT_IDS)
+        cards = await asyncio.gather(
+            *(self.aget_agent_card(name) for name in names),
+            return_exceptions=True,
+        )
+        return {name: self._ping_status(name, card) for name, card in zip(names, cards)}
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # HELPERS
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _load_disk_cards(self) -> dict:
+        """Read the on-disk agent card cache once per client."""
+        if self._disk_cards is None:
+            try:
+                with open(AGENT_CARD_CACHE_PATH) as f:
+                    self._disk_cards = json.load(f)
+            except (OSError, ValueError):
+                self._disk_cards = {}
+        return self._disk_cards
+
+    def _cached_card(self, agent_name: str) -> tuple:
+        """
+        Return (card, entry). card is set when the disk entry is still fresh;
+        entry is the raw disk entry (if any) so a stale one can be revalidated.
+        """
+        with self._disk_lock:
+            entry = self._load_disk_cards().get(f"{self._cache_scope}:{agent_name}")
+        if entry and time.time() - entry.get("fetched_at", 0) < AGENT_CARD_CACHE_TTL:
+            self._agent_cards[agent_name] = entry["card"]
+            return entry["card"], entry
+        return None, entry
 
-        url = f"{self.kibana_url}/api/agent_builder/a2a/{agent_id}"
+    def _revalidation_headers(self, entry: Optional[dict]) -> dict:
+        if entry and entry.get("etag"):
+            return {"If-None-Match": entry["etag"]}
+        return {}
 
+    def _remember_card(self, agent_name: str, card: dict, etag: Optional[str]):
+        """Store a card in memory and persist it atomically to the disk cache."""
+        self._agent_cards[agent_name] = card
+        with self._disk_lock:
+            cards = self._load_disk_cards()
+            cards[f"{self._cache_scope}:{agent_name}"] = {
+                "card": card,
+                "etag": etag,
+                "fetched_at": time.time(),
+            }
+            try:
+                os.makedirs(os.path.dirname(AGENT_CARD_CACHE_PATH), exist_ok=True)
+                tmp_path = f"{AGENT_CARD_CACHE_PATH}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(cards, f)
+                os.replace(tmp_path, AGENT_CARD_CACHE_PATH)
+            except OSError:
+                pass  # Cache is best-effort; a read-only home dir must not break calls
+
+    def _build_payload(self, message: str, context: Optional[dict],
+                       session_id: Optional[str]) -> dict:
+        """Wrap a message (and optional context) in the A2A message/send envelope."""
         # Build the message payload (may include context as additional parts)
         parts = [{"kind": "text", "text": message}]
         if context:
             parts.append({
                 "kind": "text",
-                "text": f"\n\nContext:\n{json.dumps(context, indent=2)}"
+                "text": f"\n\nContext:\n{json.dumps(context, separators=(',', ':'), ensure_ascii=False)}"
             })
 
-        request_id = str(uuid.uuid4())
-        message_id = str(uuid.uuid4())
-        session = session_id or str(uuid.uuid4())
-
-        payload = {
+        return {
             "jsonrpc": "2.0",
             "method": "message/send",
-            "id": request_id,
+            "id": secrets.token_hex(16),
             "params": {
                 "message": {
                     "role": "user",
                     "parts": parts,
-                    "messageId": message_id,
+                    "messageId": secrets.token_hex(16),
                 },
-                "sessionId": session,
+                "sessionId": session_id or secrets.token_hex(16),
             }
         }
 
-        start = time.time()
-        resp = requests.post(url, headers=self.headers, json=payload, timeout=timeout)
-
-        if resp.status_code != 200:
-            raise RuntimeError(
-                f"A2A call to '{agent_name}' failed: {resp.status_code} — {resp.text}"
-            )
-
-        duration_ms = int((time.time() - start) * 1000)
-        result = resp.json()
-
+    def _build_result(self, agent_name: str, payload: dict,
+                      result: dict, duration_ms: int) -> dict:
+        """Turn a raw A2A response into the pipeline's result dict."""
         # Extract the agent's text response from A2A response envelope
         agent_response = self._extract_text(result)
 
-        # Try to parse as JSON (agents always return JSON)
-        parsed = None
-        try:
+        # Try to parse as JSON (agents always return JSON). Only an object or an
+        # array counts — prose such as "42 tickets…" or "true, …" is kept raw.
+        clean = agent_response.strip()
+        if clean[:1] not in ("{", "["):
             # Strip markdown code fences if present
-            clean = agent_response.strip()
-            if clean.startswith("```"):
-                clean = clean.split("```")[1]
-                if clean.startswith("json"):
-                    clean = clean[4:]
-            parsed = json.loads(clean.strip())
-        except (json.JSONDecodeError, IndexError):
+            match = _FENCE_RE.search(clean)
+            clean = match.group(1).strip() if match else ""
+        parsed = None
+        if clean[:1] in ("{", "["):
+            try:
+                parsed, _ = _DECODER.raw_decode(clean)
+            except json.JSONDecodeError:
+                pass
+        if not isinstance(parsed, (dict, list)):
             parsed = {"raw_response": agent_response}
 
         return {
             "agent": agent_name,
-            "session_id": session,
-            "request_id": request_id,
+            "session_id": payload["params"]["sessionId"],
+            "request_id": payload["id"],
             "response_text": agent_response,
             "parsed": parsed,
             "duration_ms": duration_ms,
-            "success": parsed is not None and "raw_response" not in parsed,
+            "success": "raw_response" not in parsed,
         }
 
     def _extract_text(self, a2a_response: dict) -> str:
@@ -177,17 +397,25 @@ class A2AClient:
             pass
         return str(a2a_response)
 
+    def _ping_status(self, name: str, card) -> dict:
+        """Build one ping_all_agents() entry from a card (or the exception raised fetching it)."""
+        if isinstance(card, Exception):
+            return {"status": "error", "error": str(card)}
+        return {
+            "status": "online",
+            "name": card.get("name"),
+            "a2a_url": self._send_urls[name],
+        }
+
     def ping_all_agents(self) -> dict:
-        """Health check: verify all 5 agents are responding."""
-        results = {}
-        for name in AGENT_IDS:
+        """Health check: verify every configured agent is responding (cards are fetched
+        concurrently) — the 5 core agents, plus watcher_judge when FUSED_WATCHER_JUDGE is on."""
+        def fetch(name: str):
             try:
-                card = self.get_agent_card(name)
-                results[name] = {
-                    "status": "online",
-                    "name": card.get("name"),
-                    "a2a_url": f"{self.kibana_url}/api/agent_builder/a2a/{AGENT_IDS[name]}",
-                }
+                return self.get_agent_card(name)
             except Exception as e:
-                results[name] = {"status": "error", "error": str(e)}
-        return results
+                return e
+
+        with ThreadPoolExecutor(max_workers=len(AGENT_IDS)) as pool:
+            cards = pool.map(fetch, AGENT_IDS)
+            return {name: self._ping_status(name, card) for name, card in zip(AGENT_IDS, cards)}
@@ -1,6 +1,7 @@
 """
 setup/run_all.py
-Master setup runner. Executes all 4 setup steps in order.
+Master setup runner. Executes all 4 setup steps, running independent steps
+in parallel as soon as the steps they depend on have finished.
 
 Usage (from the supportiq/ project root):
   python setup/run_all.py
@@ -9,6 +10,7 @@ Usage (from the supportiq/ project root):
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # ── Resolve project root (one level above this file) ──────────────────────
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -17,28 +19,68 @@ SETUP_DIR = os.path.join(PROJECT_ROOT, "setup")
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
+# Step → steps it needs finished first. Indices (2) and agents (3) both reference
+# the inference endpoints from step 1; workflows & tools (4) need indices and agents.
+STEP_DEPENDENCIES = {
+    1: [],
+    2: [1],
+    3: [1],
+    4: [2, 3],
+}
 
-def run_step(step_num: int, name: str, script_path: str):
-    """Run a setup step as a clean subprocess."""
-    print(f"\n{'=' * 60}")
-    print(f"  STEP {step_num}: {name}")
-    print(f"{'=' * 60}")
+
+def run_step(step_num: int, name: str, script_path: str) -> int:
+    """
+    Run a setup step as a clean subprocess and return its exit code.
+    Output is captured and printed as one block, so steps running in
+    parallel do not interleave their lines.
+    """
+    header = f"\n{'=' * 60}\n  STEP {step_num}: {name}\n{'=' * 60}"
 
     if not os.path.exists(script_path):
-        print(f"  ❌  Script not found: {script_path}")
-        sys.exit(1)
+        print(f"{header}\n  ❌  Script not found: {script_path}")
+        return 1
 
     result = subprocess.run(
         [sys.executable, script_path],
         cwd=PROJECT_ROOT,
         env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
     )
 
+    print(header)
+    print(result.stdout, end="")
     if result.returncode != 0:
         print(f"\n  ❌  Step {step_num} FAILED (exit code {result.returncode})")
-        sys.exit(result.returncode)
-
-    print(f"\n  ✅  Step {step_num} complete.")
+    else:
+        print(f"\n  ✅  Step {step_num} complete.")
+    return result.returncode
+
+
+def run_steps(steps: list):
+    """Submit each step once all of its dependencies succeeded; stop on the first failure."""
+    by_num = {num: (num, name, path) for num, name, path in steps}
+    done = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+        while len(done) < len(steps):
+            for num, step in by_num.items():
+                if num not in done and num not in running.values() \
+                        and all(dep in done for dep in STEP_DEPENDENCIES.get(num, [])):
+                    running[pool.submit(run_step, *step)] = num
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                num = running.pop(future)
+                returncode = future.result()
+                if returncode != 0:
+                    # Let in-flight steps finish (no new ones start), then bail out
+                    wait(running)
+                    sys.exit(returncode)
+                done.add(num)
 
 
 if __name__ == "__main__":
@@ -64,8 +106,7 @@ if __name__ == "__main__":
          os.path.join(SETUP_DIR, "04_workflows.py")),
     ]
 
-    for num, name, path in steps:
-        run_step(num, name, path)
+    run_steps(steps)
 
     print("\n╔══════════════════════════════════════════════════════════╗")
     print("║         ✅  FULL SETUP COMPLETE — SupportIQ Ready      ║")
@@ -7,6 +7,8 @@ This is the LLM backbone all 5 agents will use.
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +24,15 @@ HEADERS = {
     "Authorization": f"ApiKey {ELASTIC_API_KEY}",
 }
 
+# All three calls go to the same cluster — reuse one keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1),
+))
+
 
 def create_gemini_inference_endpoint():
     """
@@ -48,7 +59,7 @@ def create_gemini_inference_endpoint():
     print(f"  Model: {GEMINI_MODEL}")
     print(f"  GCP Project: {GCP_PROJECT_ID} | Location: {GCP_LOCATION}")
 
-    resp = requests.put(url, headers=HEADERS, json=payload)
+    resp = SESSION.put(url, json=payload)
 
     if resp.status_code in (200, 201):
         print(f"✅ Inference endpoint '{endpoint_id}' created successfully.")
@@ -80,7 +91,7 @@ def create_embedding_endpoint():
 
     print(f"\nCreating text embedding endpoint: {endpoint_id}")
 
-    resp = requests.put(url, headers=HEADERS, json=payload)
+    resp = SESSION.put(url, json=payload)
 
     if resp.status_code in (200, 201):
         print(f"✅ Embedding endpoint '{endpoint_id}' created successfully.")
@@ -107,7 +118,7 @@ def test_inference_endpoint(endpoint_id: str):
     }
 
     print(f"\nTesting inference endpoint '{endpoint_id}'...")
-    resp = requests.post(url, headers=HEADERS, json=payload)
+    resp = SESSION.post(url, json=payload)
 
     if resp.status_code == 200:
         content = resp.json().get("completion", [{}])[0].get("result", "")
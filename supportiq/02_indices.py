@@ -5,10 +5,19 @@ Uses semantic_text fields for automatic vector generation via our Gemini embeddi
 """
 
 import os
+import gzip
+import json
+import threading
 import requests
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
-load_dotenv()
+# Skip the .env lookup when the deployment already provides the credentials
+if not (os.getenv("ELASTIC_URL") and os.getenv("ELASTIC_API_KEY")):
+    load_dotenv()
 
 ELASTIC_URL = os.getenv("ELASTIC_URL")
 ELASTIC_API_KEY = os.getenv("ELASTIC_API_KEY")
@@ -19,163 +28,135 @@ HEADERS = {
     "Authorization": f"ApiKey {ELASTIC_API_KEY}",
 }
 
-INDICES = {
-
-    # ── 1. Support Tickets ─────────────────────────────────────────────────────
-    "support-tickets": {
-        "mappings": {
-            "properties": {
-                "ticket_id":        {"type": "keyword"},
-                "created_at":       {"type": "date"},
-                "updated_at":       {"type": "date"},
-                "status":           {"type": "keyword"},   # open | triaged | resolved | escalated | closed
-                "priority_score":   {"type": "float"},
-                "priority_label":   {"type": "keyword"},   # critical | high | medium | low
-                "category":         {"type": "keyword"},   # payment | auth | checkout | api | billing ...
-                "customer_id":      {"type": "keyword"},
-                "customer_tier":    {"type": "keyword"},   # enterprise | pro | free
-                "title":            {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
-                "description":      {"type": "text"},
-                # semantic_text fields — automatically vectorized by our embedding endpoint
-                "title_semantic":           {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
-                "description_semantic":     {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
-                # Agent enrichment fields
-                "similar_tickets":          {"type": "object", "dynamic": True},
-                "triage_reasoning":         {"type": "text"},
-                "resolution_draft":         {"type": "text"},
-                "resolution_final":         {"type": "text"},
-                "resolution_confidence":    {"type": "float"},
-                "critic_score":             {"type": "float"},
-                "critic_feedback":          {"type": "text"},
-                "resolution_attempts":      {"type": "integer"},
-                "resolved_by":              {"type": "keyword"},   # agent | human
-                "assigned_agent_id":        {"type": "keyword"},
-                "sla_deadline":             {"type": "date"},
-                "sla_breached":             {"type": "boolean"},
-                "deployment_correlation":   {"type": "object", "dynamic": True},
-                "feedback_score":           {"type": "integer"},   # 1 (thumbs up) or -1 (thumbs down)
-                "feedback_agent_id":        {"type": "keyword"},
-            }
-        }
-    },
-
-    # ── 2. Knowledge Base ──────────────────────────────────────────────────────
-    "knowledge-base": {
-        "mappings": {
-            "properties": {
-                "article_id":       {"type": "keyword"},
-                "created_at":       {"type": "date"},
-                "updated_at":       {"type": "date"},
-                "category":         {"type": "keyword"},
-                "title":            {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
-                "content":          {"type": "text"},
-                "title_semantic":   {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
-                "content_semantic": {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
-                "tags":             {"type": "keyword"},
-                "version":          {"type": "keyword"},
-                "usage_count":      {"type": "integer"},
-                "avg_feedback":     {"type": "float"},
-                "negative_feedback_rate": {"type": "float"},
-                "draft":            {"type": "boolean"},
-                "draft_source_ticket_ids": {"type": "keyword"},
-            }
-        }
-    },
-
-    # ── 3. Deployments ─────────────────────────────────────────────────────────
-    "deployments": {
-        "mappings": {
-            "properties": {
-                "deployment_id":    {"type": "keyword"},
-                "deployed_at":      {"type": "date"},
-                "service":          {"type": "keyword"},   # checkout-service | auth-service | ...
-                "version":          {"type": "keyword"},
-                "environment":      {"type": "keyword"},   # production | staging
-                "deployed_by":      {"type": "keyword"},
-                "team":             {"type": "keyword"},
-                "commit_sha":       {"type": "keyword"},
-                "pr_url":           {"type": "keyword"},
-                "description":      {"type": "text"},
-                "description_semantic": {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
-                "rollback_available": {"type": "boolean"},
-                "correlated_ticket_surge": {"type": "boolean"},
-            }
-        }
-    },
-
-    # ── 4. Agent Traces (full audit trail) ────────────────────────────────────
-    "agent-traces": {
-        "mappings": {
-            "properties": {
-                "trace_id":         {"type": "keyword"},
-                "ticket_id":        {"type": "keyword"},
-                "timestamp":        {"type": "date"},
-                "agent_name":       {"type": "keyword"},   # watcher | judge | solver | critic | analyst
-                "action":           {"type": "keyword"},
-                "input_summary":    {"type": "text"},
-                "output_summary":   {"type": "text"},
-                "tool_calls":       {"type": "object", "dynamic": True},
-                "confidence":       {"type": "float"},
-                "duration_ms":      {"type": "integer"},
-                "token_count":      {"type": "integer"},
-                "decision":         {"type": "keyword"},   # auto_resolve | draft | escalate | reject | approve
-                "reasoning":        {"type": "text"},
-            }
-        }
-    },
-
-    # ── 5. Customer Profiles ──────────────────────────────────────────────────
-    "customer-profiles": {
-        "mappings": {
-            "properties": {
-                "customer_id":      {"type": "keyword"},
-                "company_name":     {"type": "keyword"},
-                "tier":             {"type": "keyword"},   # enterprise | pro | free
-                "contract_value":   {"type": "float"},
-                "sla_hours":        {"type": "integer"},   # 4 | 8 | 24 | 72
-                "open_tickets":     {"type": "integer"},
-                "lifetime_tickets": {"type": "integer"},
-                "avg_csat":         {"type": "float"},
-                "last_ticket_at":   {"type": "date"},
-                "account_manager":  {"type": "keyword"},
-                "health_score":     {"type": "float"},
-            }
-        }
-    },
-
-    # ── 6. Feedback ───────────────────────────────────────────────────────────
-    "feedback": {
-        "mappings": {
-            "properties": {
-                "feedback_id":      {"type": "keyword"},
-                "ticket_id":        {"type": "keyword"},
-                "article_id":       {"type": "keyword"},
-                "timestamp":        {"type": "date"},
-                "score":            {"type": "integer"},   # 1 or -1
-                "agent_id":         {"type": "keyword"},   # support agent who gave feedback
-                "resolution_text":  {"type": "text"},
-                "category":         {"type": "keyword"},
-                "channel":          {"type": "keyword"},   # slack | kibana | api
-            }
-        }
-    },
+# Indices are independent — create them concurrently; the lock keeps output lines whole
+MAX_WORKERS = 8
+_PRINT_LOCK = threading.Lock()
+
+# Request bodies above this size are gzip-compressed before they go on the wire
+GZIP_MIN_BYTES = 1024
+
+# One keep-alive session for every call — a single TLS handshake for the whole step
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.headers["Accept-Encoding"] = "gzip"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    # Transient 429/5xx are retried here instead of failing the whole step;
+    # every call is an idempotent PUT (or create-only POST), so POST is safe to retry
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "PUT", "POST"],
+    ),
+))
+
+# ── Shared mapping template ───────────────────────────────────────────────────
+# The ticket and knowledge-base indices share their timestamp, category and
+# title/title_semantic fields. Those live in one component template, composed by
+# an index template that matches both names, so each of their bodies in
+# indices.json only carries its own delta.
+#
+# Every *_semantic field is filled server-side by copy_to from its text source,
+# so documents carry each text once instead of twice.
+COMPONENT_TEMPLATE = "supportiq-semantic"
+INDEX_TEMPLATE = "supportiq"
+TEMPLATED_INDICES = ["support-tickets", "knowledge-base"]
+
+SHARED_PROPERTIES = {
+    "created_at":       {"type": "date"},
+    "updated_at":       {"type": "date"},
+    "category":         {"type": "keyword"},   # payment | auth | checkout | api | billing ...
+    "title":            {"type": "text", "fields": {"keyword": {"type": "keyword"}}, "copy_to": "title_semantic"},
+    "title_semantic":   {"type": "semantic_text", "inference_id": EMBEDDING_ENDPOINT},
 }
 
+# Index mappings live in indices.json next to this script and are parsed once at
+# import. semantic_text fields there omit inference_id — it is filled in from
+# EMBEDDING_ENDPOINT so the endpoint name stays defined in one place.
+INDICES_FILE = Path(__file__).with_name("indices.json")
 
-def create_index(name: str, config: dict):
-    url = f"{ELASTIC_URL}/{name}"
 
-    # Check if exists
-    check = requests.head(url, headers=HEADERS)
-    if check.status_code == 200:
-        print(f"  ⚠️  Index '{name}' already exists. Skipping.")
+def _load_indices() -> dict:
+    indices = json.loads(INDICES_FILE.read_bytes())
+    for config in indices.values():
+        for field in config["mappings"]["properties"].values():
+            if field.get("type") == "semantic_text":
+                field["inference_id"] = EMBEDDING_ENDPOINT
+    return indices
+
+
+INDICES = _load_indices()
+
+
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON request body — no spaces, no \\u-escaping of non-ASCII text."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _gzip_body(body: bytes) -> dict:
+    """Request kwargs for a JSON body — gzipped with Content-Encoding when large."""
+    if len(body) > GZIP_MIN_BYTES:
+        return {"data": gzip.compress(body, compresslevel=1), "headers": {"Content-Encoding": "gzip"}}
+    return {"data": body}
+
+
+def _log(message: str):
+    with _PRINT_LOCK:
+        print(message)
+
+
+# Index configs are static — serialize each body once at import
+COMPONENT_TEMPLATE_BODY = _dumps({"template": {"mappings": {"properties": SHARED_PROPERTIES}}})
+INDEX_TEMPLATE_BODY = _dumps({
+    "index_patterns": TEMPLATED_INDICES,
+    "composed_of": [COMPONENT_TEMPLATE],
+    "priority": 500,
+})
+INDEX_BODIES = {name: _gzip_body(_dumps(config)) for name, config in INDICES.items()}
+
+
+def put_templates():
+    """Register the shared component template and the index template composing it.
+
+    Must run before the indices are created — templates only apply at creation time.
+    """
+    for path, body in (
+        (f"_component_template/{COMPONENT_TEMPLATE}", COMPONENT_TEMPLATE_BODY),
+        (f"_index_template/{INDEX_TEMPLATE}", INDEX_TEMPLATE_BODY),
+    ):
+        resp = SESSION.put(f"{ELASTIC_URL}/{path}", **_gzip_body(body))
+        if resp.status_code not in (200, 201):
+            print(f"  ❌ Failed to register '{path}': {resp.status_code} — {resp.content[:512].decode('utf-8', 'replace')}")
+            raise RuntimeError(f"Template registration failed: {path}")
+    print(f"  ✅ Registered templates '{COMPONENT_TEMPLATE}' + '{INDEX_TEMPLATE}'")
+
+
+def existing_indices() -> frozenset:
+    """Names of every index already on the cluster — one _cat call instead of a probe per index."""
+    resp = SESSION.get(f"{ELASTIC_URL}/_cat/indices", params={"h": "index", "format": "json"})
+    resp.raise_for_status()
+    return frozenset(row["index"] for row in json.loads(resp.content))
+
+
+def create_index(name: str, body: dict, existing: frozenset = frozenset()):
+    """Create one index from its pre-serialized settings/mappings body (request kwargs from _gzip_body)."""
+    if name in existing:
+        _log(f"  ⚠️  Index '{name}' already exists. Skipping.")
         return
 
-    resp = requests.put(url, headers=HEADERS, json=config)
-    if resp.status_code in (200, 201):
-        print(f"  ✅ Created index '{name}'")
+    url = f"{ELASTIC_URL}/{name}"
+
+    # An index created between the _cat listing and this PUT fails cleanly with
+    # resource_already_exists_exception, which is treated as a skip too
+    resp = SESSION.put(url, **body)
+    if resp.status_code == 400 and b"resource_already_exists_exception" in resp.content[:512]:
+        _log(f"  ⚠️  Index '{name}' already exists. Skipping.")
+    elif resp.status_code in (200, 201):
+        _log(f"  ✅ Created index '{name}'")
     else:
-        print(f"  ❌ Failed to create '{name}': {resp.status_code} — {resp.text}")
+        _log(f"  ❌ Failed to create '{name}': {resp.status_code} — {resp.content[:512].decode('utf-8', 'replace')}")
         raise RuntimeError(f"Index creation failed: {name}")
 
 
@@ -184,8 +165,10 @@ if __name__ == "__main__":
     print("STEP 2: Creating Elasticsearch Indices")
     print("=" * 60)
 
-    for index_name, index_config in INDICES.items():
-        create_index(index_name, index_config)
+    put_templates()
+    existing = existing_indices()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(lambda name: create_index(name, INDEX_BODIES[name], existing), INDEX_BODIES))
 
     print(f"\n✅ Step 2 complete. {len(INDICES)} indices created.")
     print("   Indices: " + " | ".join(INDICES.keys()))
@@ -9,11 +9,19 @@ Each agent is configured with:
 """
 
 import os
+import gzip
 import json
+import textwrap
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
-load_dotenv()
+# Skip the .env lookup when the deployment already provides the credentials
+if not (os.getenv("KIBANA_URL") and os.getenv("KIBANA_API_KEY")):
+    load_dotenv()
 
 KIBANA_URL = os.getenv("KIBANA_URL")
 KIBANA_API_KEY = os.getenv("KIBANA_API_KEY")
@@ -25,9 +33,69 @@ HEADERS = {
     "kbn-xsrf": "true",
 }
 
+# Agents are independent — create them concurrently; the lock keeps each agent's output together
+MAX_WORKERS = 8
+_PRINT_LOCK = threading.Lock()
+
+# Request bodies above this size are gzip-compressed before they go on the wire
+GZIP_MIN_BYTES = 1024
+
+# One keep-alive session for every call — a single TLS handshake for the whole step
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.headers["Accept-Encoding"] = "gzip"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    # Transient 429/5xx are retried here instead of failing the whole step;
+    # every call is an idempotent PUT (or create-only POST), so POST is safe to retry
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "PUT", "POST"],
+    ),
+))
+
 AGENTS_BASE_URL = f"{KIBANA_URL}/api/agent_builder/agents"
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# SHARED PROMPT FRAGMENTS
+# The fused Watcher-Judge repeats the Watcher's tool steps and both agents'
+# output schemas — each fragment is defined once and spliced into every prompt
+# that uses it, so an edit lands everywhere.
+# ─────────────────────────────────────────────────────────────────────────────
+
+_ENRICHMENT_TOOL_STEPS = """1. Call `find_similar_tickets` to find the top 5 most semantically similar resolved tickets.
+2. Call `get_customer_profile` to retrieve the customer's tier, SLA hours, contract value, and open ticket count.
+"""
+
+# Body of the Watcher's output object (without the surrounding braces)
+_ENRICHMENT_FIELDS = """  "ticket_id": "<from input>",
+  "enrichment": {
+    "similar_tickets": [...],
+    "customer_tier": "...",
+    "sla_hours": 0,
+    "contract_value": 0.0,
+    "similar_count": 0,
+    "has_known_solution": false,
+    "suggested_category": "..."
+  }"""
+
+_TRIAGE_SCHEMA = """{
+  "ticket_id": "...",
+  "priority_score": 0.0,
+  "priority_label": "MEDIUM",
+  "routing_queue": "normal",
+  "surge_detected": false,
+  "surge_data": null,
+  "deployment_correlation": null,
+  "triage_reasoning": "Brief explanation of the score",
+  "sla_breach_risk": 0.0
+}"""
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # AGENT DEFINITIONS
 # Each agent has: id, name, description, system_prompt, tools[]
@@ -47,9 +115,7 @@ Your sole job is to enrich incoming support tickets with intelligence from histo
 
 When a new ticket arrives (provided as JSON), you must:
 
-1. Call `find_similar_tickets` to find the top 5 most semantically similar resolved tickets.
-2. Call `get_customer_profile` to retrieve the customer's tier, SLA hours, contract value, and open ticket count.
-3. Synthesize the results into a structured enrichment object with these fields:
+""" + _ENRICHMENT_TOOL_STEPS + """3. Synthesize the results into a structured enrichment object with these fields:
    - similar_tickets: list of {ticket_id, title, category, resolution_summary, similarity_score}
    - customer_tier: enterprise | pro | free
    - sla_hours: integer (from customer profile)
@@ -60,16 +126,7 @@ When a new ticket arrives (provided as JSON), you must:
 
 4. Return ONLY valid JSON matching this schema. No preamble, no explanation:
 {
-  "ticket_id": "<from input>",
-  "enrichment": {
-    "similar_tickets": [...],
-    "customer_tier": "...",
-    "sla_hours": 0,
-    "contract_value": 0.0,
-    "similar_count": 0,
-    "has_known_solution": false,
-    "suggested_category": "..."
-  }
+""" + _ENRICHMENT_FIELDS + """
 }
 
 You are fast, precise, and never skip tool calls. You always return valid JSON.""",
@@ -114,17 +171,7 @@ Priority labels:
 - 0-39   = LOW (async queue)
 
 Return ONLY valid JSON:
-{
-  "ticket_id": "...",
-  "priority_score": 0.0,
-  "priority_label": "MEDIUM",
-  "routing_queue": "normal",
-  "surge_detected": false,
-  "surge_data": null,
-  "deployment_correlation": null,
-  "triage_reasoning": "Brief explanation of the score",
-  "sla_breach_risk": 0.0
-}""",
+""" + _TRIAGE_SCHEMA,
         "tools": [
             "score_ticket_priority",
             "detect_ticket_surge",
@@ -144,7 +191,8 @@ Your job is to generate the best possible resolution for a support ticket using
 
 When a triaged ticket arrives (with enrichment and triage data), you must:
 
-1. Call `search_knowledge_base` with the ticket title and description to find relevant articles.
+1. Call `search_knowledge_base` with the ticket title and description to find relevant articles,
+   then call `fetch_article_content` for each article you will actually draw on (search returns metadata only).
 2. If the enrichment shows has_known_solution: true, use the similar ticket resolutions as additional context.
 3. Generate a complete, professional resolution response. It must:
    - Address the customer by their tier (enterprise = more formal)
@@ -175,6 +223,7 @@ Return ONLY valid JSON:
 }""",
         "tools": [
             "search_knowledge_base",
+            "fetch_article_content",
         ],
     },
 
@@ -281,16 +330,69 @@ Always return valid JSON. Always be specific, data-driven, and actionable.""",
             "correlate_spike_to_deployment",
         ],
     },
+
+    # ─── AGENT 6: WATCHER + JUDGE (FUSED, OPT-IN) ─────────────────────────────
+    # Enrichment and triage in one LLM round-trip. The pipeline only calls it when
+    # FUSED_WATCHER_JUDGE=true; the separate Watcher and Judge stay the default path.
+    {
+        "id": "supportiq_watcher_judge",
+        "name": "SupportIQ Watcher-Judge",
+        "description": "Fused intake + triage agent. Enriches a new ticket and scores its priority in a single pass.",
+        "inference_id": LLM_INFERENCE_ID,
+        "system_prompt": """You are the Watcher-Judge — the combined intake and triage agent for SupportIQ.
+
+When a new ticket arrives (provided as JSON), do BOTH jobs in order.
+
+PART 1 — ENRICH (Watcher):
+""" + _ENRICHMENT_TOOL_STEPS + """3. Build the enrichment object:
+   - similar_tickets: list of {ticket_id, title, category, resolution_summary, similarity_score}
+   - customer_tier, sla_hours, contract_value, similar_count
+   - has_known_solution: true if any similar ticket has a resolution_confidence > 0.85
+   - suggested_category
+
+PART 2 — TRIAGE (Judge), using the enrichment you just built:
+1. Call `score_ticket_priority` with ticket_id, customer_tier, sla_hours, and category.
+2. Call `detect_ticket_surge` with the category.
+3. If surge_detected is true, call `correlate_spike_to_deployment` with category and the current timestamp.
+4. Score priority exactly as the Judge does (tier, SLA, recurrence, breach risk, surge points) and label it
+   CRITICAL (85-100) | HIGH (65-84) | MEDIUM (40-64) | LOW (0-39).
+
+Return ONLY valid JSON. No preamble, no explanation:
+{
+""" + _ENRICHMENT_FIELDS + """,
+  "triage": """ + textwrap.indent(_TRIAGE_SCHEMA, "  ").lstrip() + """
+}""",
+        "tools": [
+            "find_similar_tickets",
+            "get_customer_profile",
+            "score_ticket_priority",
+            "detect_ticket_surge",
+            "correlate_spike_to_deployment",
+        ],
+    },
 ]
 
 
-def create_agent(agent_config: dict):
-    """Create a single agent via the Kibana Agent Builder API."""
-    agent_id = agent_config["id"]
-    url = f"{AGENTS_BASE_URL}/{agent_id}"
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON request body — no spaces, no \\u-escaping of non-ASCII text."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _gzip_body(body: bytes) -> dict:
+    """Request kwargs for a JSON body — gzipped with Content-Encoding when large."""
+    if len(body) > GZIP_MIN_BYTES:
+        return {"data": gzip.compress(body, compresslevel=1), "headers": {"Content-Encoding": "gzip"}}
+    return {"data": body}
+
+
+def _log(*lines: str):
+    with _PRINT_LOCK:
+        print("\n".join(lines))
+
 
-    # Map our config to the Agent Builder API schema
-    payload = {
+def _agent_payload(agent_config: dict) -> dict:
+    """Map our config to the Agent Builder API schema."""
+    return {
         "name": agent_config["name"],
         "description": agent_config["description"],
         "inference_id": agent_config["inference_id"],
@@ -299,28 +401,68 @@ def create_agent(agent_config: dict):
         "a2a_enabled": True,   # CRITICAL: expose each agent as A2A endpoint
     }
 
-    # Check if agent already exists
-    check = requests.get(url, headers=HEADERS)
-    if check.status_code == 200:
-        print(f"  ⚠️  Agent '{agent_id}' already exists. Updating...")
-        resp = requests.put(url, headers=HEADERS, json=payload)
-    else:
-        resp = requests.post(AGENTS_BASE_URL, headers=HEADERS, json={"id": agent_id, **payload})
+
+# Agent definitions are static — serialize each request body once at import,
+# not on every call or retry
+AGENT_BODIES = {agent["id"]: _gzip_body(_dumps(_agent_payload(agent))) for agent in AGENTS}
+
+# Registry entries (A2A card + endpoint URLs) are static too
+A2A_BASE_URL = f"{KIBANA_URL}/api/agent_builder/a2a"
+A2A_ENTRIES = {
+    agent["id"]: {
+        "agent_id": agent["id"],
+        "a2a_card_url": f"{A2A_BASE_URL}/{agent['id']}.json",
+        "a2a_endpoint": f"{A2A_BASE_URL}/{agent['id']}",
+    }
+    for agent in AGENTS
+}
+
+
+def warm_up(connections: int) -> bool:
+    """
+    Open pooled keep-alive connections to Kibana before the fan-out, so the
+    workers reuse live sockets instead of each paying a TLS handshake.
+    Non-fatal; returns False on failure.
+    """
+    url = f"{KIBANA_URL}/api/status"
+
+    def prime(_):
+        resp = SESSION.get(url, timeout=5)
+        resp.close()
+        return resp.ok
+
+    try:
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            return all(pool.map(prime, range(connections)))
+    except requests.RequestException:
+        return False
+
+
+def create_agent(agent_config: dict):
+    """Create a single agent via the Kibana Agent Builder API."""
+    agent_id = agent_config["id"]
+    url = f"{AGENTS_BASE_URL}/{agent_id}"
+
+    # Output is collected per agent and printed in one block (agents run concurrently)
+    lines = [f"\nCreating Agent: {agent_config['name']}"]
+
+    # PUT updates an existing agent in one round-trip; create only when it is missing
+    resp = SESSION.put(url, **AGENT_BODIES[agent_id])
+    if resp.status_code == 404:
+        resp = SESSION.post(AGENTS_BASE_URL, **_gzip_body(_dumps({"id": agent_id, **_agent_payload(agent_config)})))
+    elif resp.status_code in (200, 201):
+        lines.append(f"  ⚠️  Agent '{agent_id}' already exists. Updated.")
 
     if resp.status_code in (200, 201):
-        data = resp.json()
-        a2a_card_url = f"{KIBANA_URL}/api/agent_builder/a2a/{agent_id}.json"
-        a2a_endpoint = f"{KIBANA_URL}/api/agent_builder/a2a/{agent_id}"
-        print(f"  ✅ Agent '{agent_id}' ready.")
-        print(f"     A2A Card     : {a2a_card_url}")
-        print(f"     A2A Endpoint : {a2a_endpoint}")
-        return {
-            "agent_id": agent_id,
-            "a2a_card_url": a2a_card_url,
-            "a2a_endpoint": a2a_endpoint,
-        }
+        entry = A2A_ENTRIES[agent_id]
+        _log(*lines,
+             f"  ✅ Agent '{agent_id}' ready.",
+             f"     A2A Card     : {entry['a2a_card_url']}",
+             f"     A2A Endpoint : {entry['a2a_endpoint']}")
+        return entry
     else:
-        print(f"  ❌ Failed: {resp.status_code} — {resp.text}")
+        # Bounded error excerpt — the body is never parsed or fully decoded
+        _log(*lines, f"  ❌ Failed: {resp.status_code} — {resp.content[:512].decode('utf-8', 'replace')}")
         raise RuntimeError(f"Agent creation failed: {agent_id}")
 
 
@@ -329,19 +471,19 @@ if __name__ == "__main__":
     print("STEP 3: Creating SupportIQ Agents in Elastic Agent Builder")
     print("=" * 60)
 
-    registry = {}
-    for agent in AGENTS:
-        print(f"\nCreating Agent: {agent['name']}")
-        info = create_agent(agent)
-        registry[agent["id"]] = info
+    warm_up(min(len(AGENTS), MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        registry = {info["agent_id"]: info for info in pool.map(create_agent, AGENTS)}
 
     print("\n" + "=" * 60)
-    print("✅ Step 3 complete. All 5 agents deployed.")
+    print(f"✅ Step 3 complete. All {len(AGENTS)} agents deployed.")
     print("=" * 60)
+    # Serialize once — the same text is printed and saved
+    registry_json = json.dumps(registry, indent=2)
     print("\nA2A Endpoint Registry:")
-    print(json.dumps(registry, indent=2))
+    print(registry_json)
 
     # Save registry for use by orchestrator
     with open("agent_registry.json", "w") as f:
-        json.dump(registry, f, indent=2)
+        f.write(registry_json)
     print("\nRegistry saved to agent_registry.json")
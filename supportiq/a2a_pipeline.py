@@ -17,21 +17,41 @@ The self-correcting Critic→Solver loop is what makes this unique.
 
 import os
 import json
+import atexit
+import hashlib
 import logging
+import logging.handlers
 import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional
+from urllib.parse import quote, urlsplit
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 from a2a_client import A2AClient
+from workflow_tools import validate_request
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-)
+# Pipeline threads only enqueue log records (QueueHandler.prepare() still merges
+# the message arguments in the calling thread); a listener thread applies the
+# line format and does the blocking stderr writes. Only installed when logging
+# has not been configured yet — basicConfig() would not replace existing handlers.
+if not logging.getLogger().handlers:
+    _log_queue = queue.SimpleQueue()
+    _log_stream = logging.StreamHandler()
+    _log_stream.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+    _log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+    logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(_log_queue)])
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 logger = logging.getLogger("SupportIQ.Pipeline")
 
 KIBANA_URL = os.getenv("KIBANA_URL")
@@ -44,6 +64,33 @@ AUTO_RESOLVE_THRESHOLD = float(os.getenv("AUTO_RESOLVE_CONFIDENCE_THRESHOLD", "0
 ESCALATE_THRESHOLD = float(os.getenv("ESCALATE_CONFIDENCE_THRESHOLD", "0.65"))
 CRITIC_QUALITY_THRESHOLD = float(os.getenv("CRITIC_QUALITY_THRESHOLD", "0.75"))
 MAX_SOLVER_ATTEMPTS = 3
+# Opt-in: one fused Watcher+Judge agent call instead of two sequential round-trips
+FUSED_WATCHER_JUDGE = os.getenv("FUSED_WATCHER_JUDGE", "false").lower() == "true"
+# Watcher matches at or above this (normalized, 0–1) similarity reuse the matched
+# ticket's resolution — auto-resolved from AUTO_RESOLVE_THRESHOLD up, drafted for
+# approval below it
+KNOWN_SOLUTION_SIMILARITY = float(os.getenv("KNOWN_SOLUTION_SIMILARITY", "0.80"))
+# Critic calls are skipped for drafts the Solver itself rates as hopeless (regenerate
+# straight away) and for near-certain drafts that a human reviews anyway
+SOLVER_REGENERATE_BELOW = float(os.getenv("SOLVER_REGENERATE_BELOW", "0.40"))
+CRITIC_SKIP_ABOVE = float(os.getenv("CRITIC_SKIP_ABOVE", "0.95"))
+
+# Semantic resolution cache — near-duplicate tickets reuse an approved resolution
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+# LSH pre-filter: 8 tables × 8-bit signatures, used once the cache outgrows a flat
+# scan (~96% recall at the 0.92 threshold — see LSHSemanticCache)
+LSH_TABLES = int(os.getenv("SEMANTIC_CACHE_LSH_TABLES", "8"))
+LSH_BITS = int(os.getenv("SEMANTIC_CACHE_LSH_BITS", "8"))
+LSH_FLAT_BELOW = int(os.getenv("SEMANTIC_CACHE_LSH_FLAT_BELOW", "2048"))
+EMBEDDING_ENDPOINT_ID = "supportiq-embeddings"   # created in setup/01_inference_endpoint.py
+
+# Webhook intake: tickets arriving in one burst window share a single embedding call
+INTAKE_BATCH_SIZE = int(os.getenv("INTAKE_BATCH_SIZE", "16"))
+INTAKE_BATCH_WINDOW_MS = int(os.getenv("INTAKE_BATCH_WINDOW_MS", "50"))
+INTAKE_WORKERS = int(os.getenv("INTAKE_WORKERS", "8"))
 
 ES_HEADERS = {
     "Content-Type": "application/json",
@@ -55,6 +102,247 @@ KIBANA_HEADERS = {
     "kbn-xsrf": "true",
 }
 
+ES_BULK_HEADERS = {**ES_HEADERS, "Content-Type": "application/x-ndjson"}
+JSON_HEADERS = {"Content-Type": "application/json"}   # Slack incoming webhooks
+
+# One keep-alive pool shared by every ES / Kibana / Slack side-effect call.
+# Auth differs per host, so headers are still passed on each request.
+SESSION = requests.Session()
+SESSION.headers["Connection"] = "keep-alive"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.1),
+))
+
+# A host that just answered 429 / 5xx is not called again for a few seconds.
+# Surges are exactly when Slack and Kibana throttle; repeat calls during that
+# window would only fail too and add to their load.
+NEGATIVE_CACHE_TTL = 5
+_BACKOFF_UNTIL = {}   # host → (status, monotonic expiry)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# JSON ENCODING & PROMPTS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _prompt_json(obj) -> str:
+    """Compact JSON for agent prompts — indentation only costs tokens and prefill time."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON request body (what requests' json= does, minus the spaces)."""
+    return _prompt_json(obj).encode()
+
+
+# ── Prompt fragments ── static text is fixed at import; each prompt is a join of
+# these with the JSON payloads, which are serialized once per ticket, not per call.
+WATCHER_PROMPT = "New support ticket received. Please enrich it:\n\n"
+WATCHER_JUDGE_PROMPT = "New support ticket received. Enrich it, then triage it:\n\n"
+JUDGE_PROMPT = ("Triage this enriched support ticket:\n\nTicket:\n", "\n\nEnrichment data:\n")
+SOLVER_PROMPT = ("Resolve this support ticket.\n\nTicket:\n", "\n\nEnrichment:\n", "\n\nTriage:\n")
+SOLVER_RETRY_PROMPT = (
+    "\n\n⚠️ PREVIOUS ATTEMPT WAS REJECTED by the Critic Agent.\nprevious_attempt: ",
+    "\n\nDO NOT repeat the same mistakes. Address every point in critic_feedback.",
+)
+CRITIC_PROMPT = "Evaluate this resolution draft:\n\nTicket:\n"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SEMANTIC RESOLUTION CACHE — near-duplicate tickets skip Solver + Critic
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SemanticCache:
+    """
+    In-process cache of Critic-approved resolutions, keyed by ticket content.
+
+    Two tiers:
+      1. exact    — sha256 of category/title/description, a plain dict hit
+      2. semantic — cosine similarity over L2-normalised ticket embeddings,
+                    restricted to the same category, accepted above `threshold`
+
+    Entries expire after `ttl` seconds; the least recently used entry is
+    evicted once `max_entries` is reached. Safe to share across threads.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: int = SEMANTIC_CACHE_TTL,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key → (vector, category, resolution, expires_at)
+        self._lock = threading.Lock()
+        # Vectors live in a row store that only grows on put: rows of replaced or
+        # evicted entries are marked dead, and the store is compacted once dead
+        # rows outnumber live ones — never rebuilt per write
+        self._matrix = None             # (capacity, dim) vectors; rows [0, _rows) in use
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_keys = []
+        self._row_categories = np.empty(0, dtype=object)
+        self._row_of = {}               # key → its live row
+        self._rows = 0
+        self._dead = 0
+
+    @staticmethod
+    def exact_key(ticket: dict) -> str:
+        text = "\x1f".join((
+            ticket.get("category") or "",
+            (ticket.get("title") or "").strip().lower(),
+            (ticket.get("description") or "").strip().lower(),
+        ))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str, vector: Optional[np.ndarray], category: Optional[str]) -> Optional[tuple]:
+        """Return (resolution, tier, similarity) for a cached match, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[3] > now:
+                self._entries.move_to_end(key)
+                return entry[2], "exact", 1.0
+            if vector is None or not self._row_of:
+                return None
+
+            rows = self._candidates(vector, category)
+            if len(rows) == 0:
+                return None
+            sims = self._matrix[rows] @ vector
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            hit_key = self._row_keys[rows[best]]
+            entry = self._entries[hit_key]
+            if entry[3] <= now:
+                return None
+            self._entries.move_to_end(hit_key)
+            return entry[2], "semantic", float(sims[best])
+
+    def put(self, key: str, vector: Optional[np.ndarray], category: Optional[str], resolution: dict):
+        with self._lock:
+            self._drop_row(key)
+            self._entries[key] = (vector, category, resolution, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+            if vector is not None:
+                self._append_row(key, vector, category or "")
+            if self._dead > len(self._row_of):
+                self._compact()
+
+    def _candidates(self, vector: np.ndarray, category: Optional[str]) -> np.ndarray:
+        """Row indices worth scoring — a flat scan of the ticket's live category rows."""
+        n = self._rows
+        return np.flatnonzero((self._row_categories[:n] == (category or "")) & self._alive[:n])
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if e[3] <= now]:
+            del self._entries[key]
+            self._drop_row(key)
+        while len(self._entries) > self.max_entries:
+            self._drop_row(self._entries.popitem(last=False)[0])
+
+    def _drop_row(self, key: str):
+        row = self._row_of.pop(key, None)
+        if row is not None:
+            self._alive[row] = False
+            self._dead += 1
+
+    def _append_row(self, key: str, vector: np.ndarray, category: str):
+        if self._matrix is None:
+            self._matrix = np.empty((0, len(vector)), dtype=np.float32)
+        if self._rows == len(self._matrix):
+            # Grow by doubling, so appends are amortised O(dim)
+            capacity = max(64, 2 * self._rows)
+            self._matrix = np.resize(self._matrix, (capacity, self._matrix.shape[1]))
+            self._alive = np.resize(self._alive, capacity)
+            self._alive[self._rows:] = False
+            self._row_categories = np.resize(self._row_categories, capacity)
+        row = self._rows
+        self._matrix[row] = vector
+        self._alive[row] = True
+        self._row_categories[row] = category
+        self._row_keys.append(key)
+        self._row_of[key] = row
+        self._rows += 1
+        self._index_rows(row, row + 1)
+
+    def _compact(self):
+        """Re-pack the live rows (in cache order) and re-index them."""
+        rows = [(k, e[0], e[1] or "") for k, e in self._entries.items() if e[0] is not None]
+        self._row_keys = [k for k, _, _ in rows]
+        self._row_of = {k: i for i, k in enumerate(self._row_keys)}
+        self._row_categories = np.array([c for _, _, c in rows], dtype=object)
+        self._alive = np.ones(len(rows), dtype=bool)
+        if rows:
+            self._matrix = np.vstack([v for _, v, _ in rows]).astype(np.float32)
+        self._rows = len(rows)
+        self._dead = 0
+        self._index_rows(0, self._rows, reset=True)
+
+    def _index_rows(self, start: int, stop: int, reset: bool = False):
+        """Hook for subclasses that keep an index over rows [start, stop)."""
+
+
+class LSHSemanticCache(SemanticCache):
+    """
+    SemanticCache with a random-projection LSH pre-filter in front of the scan.
+
+    Each of `tables` hash tables maps a vector to a `bits`-bit signature (the
+    sign of its projection onto random hyperplanes). Buckets are grouped by
+    category; a lookup unions the query's bucket from every table and runs
+    the exact cosine only on that shortlist. Below `flat_below` cached rows
+    the plain category scan is cheaper, so LSH stays off.
+
+    Recall: a neighbour at cosine c shares one table's bucket with probability
+    p = (1 - arccos(c)/π) ** bits, and is found with 1 - (1 - p) ** tables.
+    With the defaults (8 × 8) that is ~96% at the 0.92 cache threshold and
+    ~99% at 0.95, while a random row lands in the shortlist only ~3% of the time.
+    More bits shrink the shortlist but lose recall fast (16 bits: ~61% at 0.92).
+    """
+
+    def __init__(self, *args, tables: int = LSH_TABLES, bits: int = LSH_BITS,
+                 flat_below: int = LSH_FLAT_BELOW, seed: int = 0, **kwargs):
+        self.tables = tables
+        self.bits = bits
+        self.flat_below = flat_below
+        self._rng = np.random.default_rng(seed)
+        self._planes = None             # (tables * bits, dim) random hyperplanes
+        self._weights = (1 << np.arange(bits)).astype(np.int64)
+        self._buckets = {}              # (category, table, signature) → [row, ...]
+        super().__init__(*args, **kwargs)
+
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) vectors → (n, tables) integer signatures."""
+        signs = (vectors @ self._planes.T) > 0
+        return signs.reshape(len(vectors), self.tables, self.bits).astype(np.int64) @ self._weights
+
+    def _index_rows(self, start: int, stop: int, reset: bool = False):
+        # put() hashes only the new row; the full pass runs on compaction alone
+        if reset:
+            self._buckets = {}
+        if start == stop:
+            return
+        if self._planes is None:
+            dim = self._matrix.shape[1]
+            self._planes = self._rng.standard_normal((self.tables * self.bits, dim)).astype(np.float32)
+        signatures = self._signatures(self._matrix[start:stop])
+        for row, row_signatures in zip(range(start, stop), signatures.tolist()):
+            category = self._row_categories[row]
+            for table, signature in enumerate(row_signatures):
+                self._buckets.setdefault((category, table, signature), []).append(row)
+
+    def _candidates(self, vector: np.ndarray, category: Optional[str]) -> np.ndarray:
+        if len(self._row_of) < self.flat_below:
+            return super()._candidates(vector, category)
+        category = category or ""
+        rows = set()
+        for table, signature in enumerate(self._signatures(vector[None, :])[0].tolist()):
+            rows.update(self._buckets.get((category, table, signature), ()))
+        rows = np.fromiter(rows, dtype=np.intp, count=len(rows))
+        return rows[self._alive[rows]]
+
 
 class SupportIQPipeline:
     """
@@ -64,27 +352,40 @@ class SupportIQPipeline:
 
     def __init__(self):
         self.client = A2AClient()
-        self.pipeline_start = None
+        self.cache = LSHSemanticCache() if SEMANTIC_CACHE_ENABLED else None
+        # ES writes and workflow triggers are side effects no agent call waits on.
+        # A single background worker overlaps them with the next agent round-trip
+        # while keeping each ticket's status transitions in submission order.
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="supportiq-io")
+        self._background.submit(self.client.warm_up)   # prime A2A connections off the hot path
+        # Slack / workflow webhooks are one-way: their responses are ignored, so they are
+        # handed to a small pool and the pipeline only pays the enqueue cost.
+        self._notifier = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supportiq-notify")
+        # Ticket mutations are buffered per ticket and written with the trace in one _bulk
+        self._pending_updates = {}
+        self._pending_lock = threading.Lock()
 
     # ─────────────────────────────────────────────────────────────────────────
     # PUBLIC ENTRY POINT
     # ─────────────────────────────────────────────────────────────────────────
 
-    def process_ticket(self, ticket: dict) -> dict:
+    def process_ticket(self, ticket: dict, embedding: Optional[np.ndarray] = None) -> dict:
         """
         Full pipeline execution for a single ticket.
         Returns a complete trace of all agent decisions.
+        `embedding` may carry a ticket embedding already fetched by TicketBatcher.
         """
-        self.pipeline_start = time.time()
-        ticket_id = ticket.get("ticket_id", f"TKT-{int(time.time())}")
-        logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        logger.info(f"🎫 Processing ticket: {ticket_id}")
-        logger.info(f"   Title: {ticket.get('title', 'N/A')[:60]}")
-        logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        # One clock read per run — local, since worker threads share this pipeline
+        started = time.time()
+        ticket_id = ticket.get("ticket_id", f"TKT-{int(started)}")
+        logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        logger.info("🎫 Processing ticket: %s", ticket_id)
+        logger.info("   Title: %.60s", ticket.get("title", "N/A"))
+        logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
         trace = {
             "ticket_id": ticket_id,
-            "pipeline_start": datetime.now(timezone.utc).isoformat(),
+            "pipeline_start": datetime.fromtimestamp(started, timezone.utc).isoformat(),
             "steps": [],
             "final_decision": None,
             "final_resolution": None,
@@ -92,14 +393,28 @@ class SupportIQPipeline:
         }
 
         try:
-            # ── STEP 1: WATCHER ──────────────────────────────────────────────
-            enrichment = self._run_watcher(ticket, trace)
+            fused = self._run_watcher_judge(ticket, trace) if FUSED_WATCHER_JUDGE else None
+            if fused:
+                # ── STEP 1+2: WATCHER + JUDGE (fused, one agent call) ─────────
+                enrichment, triage = fused
+            else:
+                # ── STEP 1: WATCHER ──────────────────────────────────────────
+                enrichment = self._run_watcher(ticket, trace)
 
-            # ── STEP 2: JUDGE ─────────────────────────────────────────────────
-            triage = self._run_judge(ticket, enrichment, trace)
+                # ── STEP 2: JUDGE ─────────────────────────────────────────────
+                triage = self._run_judge(ticket, enrichment, trace)
 
             # ── STEP 3 & 4: SOLVER + CRITIC LOOP ─────────────────────────────
-            resolution = self._run_solver_critic_loop(ticket, enrichment, triage, trace)
+            # Skipped when the Watcher found a known solution or the cache hits
+            resolution = self._known_solution(ticket, enrichment, trace)
+            if resolution is None:
+                resolution, cache_key, vector = self._check_cache(ticket, trace, embedding)
+            if resolution is None:
+                resolution = self._run_solver_critic_loop(ticket, enrichment, triage, trace)
+                # Only Critic-approved drafts are cached — not flagged or unreviewed ones
+                if (self.cache is not None and not resolution.get("quality_warning")
+                        and not resolution.get("critic_skipped")):
+                    self.cache.put(cache_key, vector, ticket.get("category"), resolution)
 
             # ── STEP 5: DECISION & ACTION ─────────────────────────────────────
             final = self._execute_decision(ticket, resolution, triage, trace)
@@ -107,13 +422,13 @@ class SupportIQPipeline:
             trace["final_resolution"] = final.get("resolution_text")
 
         except Exception as e:
-            logger.error(f"Pipeline error for {ticket_id}: {e}", exc_info=True)
+            logger.error("Pipeline error for %s: %s", ticket_id, e, exc_info=True)
             trace["error"] = str(e)
             trace["final_decision"] = "error"
 
-        trace["total_duration_ms"] = int((time.time() - self.pipeline_start) * 1000)
-        logger.info(f"✅ Pipeline complete: {ticket_id} → {trace['final_decision']} "
-                    f"({trace['total_duration_ms']}ms)")
+        trace["total_duration_ms"] = int((time.time() - started) * 1000)
+        logger.info("✅ Pipeline complete: %s → %s (%sms)",
+                    ticket_id, trace["final_decision"], trace["total_duration_ms"])
 
         # Write full trace to Elasticsearch
         self._write_pipeline_trace(trace)
@@ -127,24 +442,25 @@ class SupportIQPipeline:
     def _run_watcher(self, ticket: dict, trace: list) -> dict:
         logger.info("  [1/4] 👀 Watcher: Enriching ticket...")
 
-        message = f"""New support ticket received. Please enrich it:
-
-{json.dumps(ticket, indent=2)}"""
+        message = WATCHER_PROMPT + _prompt_json(ticket)
 
         result = self.client.send_message("watcher", message)
-        enrichment = result["parsed"]
+        return self._record_enrichment(ticket, result["parsed"], result["duration_ms"], trace, "watcher")
 
+    def _record_enrichment(self, ticket: dict, enrichment: dict, duration_ms: Optional[int],
+                           trace: dict, agent: str) -> dict:
         trace["steps"].append({
             "step": 1,
-            "agent": "watcher",
-            "duration_ms": result["duration_ms"],
+            "agent": agent,
+            "duration_ms": duration_ms,
             "similar_count": enrichment.get("enrichment", {}).get("similar_count", 0),
             "has_known_solution": enrichment.get("enrichment", {}).get("has_known_solution", False),
             "customer_tier": enrichment.get("enrichment", {}).get("customer_tier", "unknown"),
         })
 
-        logger.info(f"     ✓ Found {enrichment.get('enrichment', {}).get('similar_count', 0)} similar tickets | "
-                    f"Known solution: {enrichment.get('enrichment', {}).get('has_known_solution', False)}")
+        logger.info("     ✓ Found %s similar tickets | Known solution: %s",
+                    enrichment.get("enrichment", {}).get("similar_count", 0),
+                    enrichment.get("enrichment", {}).get("has_known_solution", False))
 
         # Update ticket in Elasticsearch with enrichment
         self._update_ticket_es(ticket["ticket_id"], {
@@ -163,32 +479,28 @@ class SupportIQPipeline:
     def _run_judge(self, ticket: dict, enrichment: dict, trace: list) -> dict:
         logger.info("  [2/4] ⚖️  Judge: Scoring priority...")
 
-        message = f"""Triage this enriched support ticket:
-
-Ticket:
-{json.dumps(ticket, indent=2)}
-
-Enrichment data:
-{json.dumps(enrichment, indent=2)}"""
+        message = "".join((JUDGE_PROMPT[0], _prompt_json(ticket), JUDGE_PROMPT[1], _prompt_json(enrichment)))
 
         result = self.client.send_message("judge", message)
-        triage = result["parsed"]
+        return self._record_triage(ticket, result["parsed"], result["duration_ms"], trace, "judge")
 
+    def _record_triage(self, ticket: dict, triage: dict, duration_ms: Optional[int],
+                       trace: dict, agent: str) -> dict:
         priority = triage.get("priority_label", "UNKNOWN")
         surge = triage.get("surge_detected", False)
         score = triage.get("priority_score", 0)
 
         trace["steps"].append({
             "step": 2,
-            "agent": "judge",
-            "duration_ms": result["duration_ms"],
+            "agent": agent,
+            "duration_ms": duration_ms,
             "priority_score": score,
             "priority_label": priority,
             "surge_detected": surge,
             "deployment_correlated": triage.get("deployment_correlation") is not None,
         })
 
-        logger.info(f"     ✓ Priority: {priority} ({score:.1f}) | Surge: {surge}")
+        logger.info("     ✓ Priority: %s (%.1f) | Surge: %s", priority, score, surge)
 
         # If surge detected + deployment correlated → Ghost Ticket Alert
         if surge and triage.get("deployment_correlation"):
@@ -206,6 +518,29 @@ Enrichment data:
 
         return triage
 
+    # ─────────────────────────────────────────────────────────────────────────
+    # STEP 1+2: FUSED WATCHER + JUDGE (opt-in via FUSED_WATCHER_JUDGE)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _run_watcher_judge(self, ticket: dict, trace: dict) -> Optional[tuple]:
+        """
+        Enrich and triage in a single agent round-trip.
+        Returns (enrichment, triage) shaped like the two-agent path, or None when the
+        fused reply is incomplete so the caller falls back to Watcher → Judge.
+        """
+        logger.info("  [1+2/4] 👀⚖️  Watcher+Judge: Enriching and scoring in one call...")
+
+        result = self.client.send_message("watcher_judge", WATCHER_JUDGE_PROMPT + _prompt_json(ticket))
+        parsed = result["parsed"]
+        if not isinstance(parsed.get("enrichment"), dict) or not isinstance(parsed.get("triage"), dict):
+            logger.warning("     Fused reply missing enrichment/triage — falling back to Watcher → Judge")
+            return None
+
+        enrichment = {"ticket_id": parsed.get("ticket_id"), "enrichment": parsed["enrichment"]}
+        enrichment = self._record_enrichment(ticket, enrichment, result["duration_ms"], trace, "watcher_judge")
+        triage = self._record_triage(ticket, parsed["triage"], None, trace, "watcher_judge")
+        return enrichment, triage
+
     # ─────────────────────────────────────────────────────────────────────────
     # STEP 3+4: SOLVER + CRITIC LOOP (self-correcting)
     # ─────────────────────────────────────────────────────────────────────────
@@ -217,53 +552,80 @@ Enrichment data:
         previous_attempt = None
         final_resolution = None
 
+        # The ticket context is identical across attempts — build it once
+        solver_base = "".join((
+            SOLVER_PROMPT[0], _prompt_json(ticket),
+            SOLVER_PROMPT[1], _prompt_json(enrichment),
+            SOLVER_PROMPT[2], _prompt_json(triage),
+        ))
+        critic_base = (
+            f"{CRITIC_PROMPT}title: {ticket.get('title')}\n"
+            f"description: {ticket.get('description')}\n"
+            f"category: {ticket.get('category', 'unknown')}\n\nResolution draft:\n"
+        )
+
         for attempt in range(1, MAX_SOLVER_ATTEMPTS + 1):
-            logger.info(f"     Solver attempt {attempt}/{MAX_SOLVER_ATTEMPTS}...")
+            logger.info("     Solver attempt %d/%d...", attempt, MAX_SOLVER_ATTEMPTS)
 
             # ── SOLVER ────────────────────────────────────────────────────────
-            solver_message = f"""Resolve this support ticket.
-
-Ticket:
-{json.dumps(ticket, indent=2)}
-
-Enrichment:
-{json.dumps(enrichment, indent=2)}
-
-Triage:
-{json.dumps(triage, indent=2)}"""
-
+            solver_message = solver_base
             if previous_attempt:
-                solver_message += f"""
-
-⚠️ PREVIOUS ATTEMPT WAS REJECTED by the Critic Agent.
-previous_attempt: {json.dumps(previous_attempt, indent=2)}
-
-DO NOT repeat the same mistakes. Address every point in critic_feedback."""
+                solver_message = "".join((solver_base, SOLVER_RETRY_PROMPT[0],
+                                          _prompt_json(previous_attempt), SOLVER_RETRY_PROMPT[1]))
 
             solver_result = self.client.send_message("solver", solver_message)
             resolution = solver_result["parsed"]
             confidence = resolution.get("confidence", 0)
 
-            logger.info(f"       Solver: confidence={confidence:.2f}, "
-                        f"decision={resolution.get('decision')}")
+            logger.info("       Solver: confidence=%.2f, decision=%s", confidence, resolution.get("decision"))
+
+            if confidence < SOLVER_REGENERATE_BELOW and attempt < MAX_SOLVER_ATTEMPTS:
+                logger.info("     ✗ Confidence below %.2f — regenerating without Critic", SOLVER_REGENERATE_BELOW)
+                trace["steps"].append({
+                    "step": f"3.{attempt}",
+                    "agent": "solver",
+                    "attempt": attempt,
+                    "solver_confidence": confidence,
+                    "critic_decision": "SKIPPED_LOW_CONFIDENCE",
+                    "solver_duration_ms": solver_result["duration_ms"],
+                })
+                previous_attempt = {
+                    "resolution_draft": resolution.get("resolution_draft"),
+                    "confidence": confidence,
+                    "critic_feedback": "Your own confidence in this draft was too low to submit. "
+                                       "Use the similar ticket resolutions and KB articles more directly.",
+                }
+                continue
+
+            if confidence > CRITIC_SKIP_ABOVE and resolution.get("decision") != "auto_resolve":
+                # Never reaches a customer unreviewed — a human approves or takes it over
+                logger.info("     ✓ Confidence above %.2f and human-reviewed — Critic skipped", CRITIC_SKIP_ABOVE)
+                trace["steps"].append({
+                    "step": f"3.{attempt}",
+                    "agent": "solver",
+                    "attempt": attempt,
+                    "solver_confidence": confidence,
+                    "critic_decision": "SKIPPED_HUMAN_REVIEW",
+                    "solver_duration_ms": solver_result["duration_ms"],
+                })
+                final_resolution = {
+                    **resolution,
+                    "critic_quality_score": None,
+                    "critic_skipped": True,
+                    "attempts": attempt,
+                    "final": True,
+                }
+                break
 
             # ── CRITIC ────────────────────────────────────────────────────────
-            critic_message = f"""Evaluate this resolution draft:
-
-Ticket:
-title: {ticket.get('title')}
-description: {ticket.get('description')}
-category: {ticket.get('category', 'unknown')}
-
-Resolution draft:
-{json.dumps(resolution, indent=2)}"""
+            critic_message = critic_base + _prompt_json(resolution)
 
             critic_result = self.client.send_message("critic", critic_message)
             quality = critic_result["parsed"]
             quality_score = quality.get("quality_score", 0)
             critic_decision = quality.get("decision", "REJECTED")
 
-            logger.info(f"       Critic: quality={quality_score:.2f}, decision={critic_decision}")
+            logger.info("       Critic: quality=%.2f, decision=%s", quality_score, critic_decision)
 
             trace["steps"].append({
                 "step": f"3.{attempt}",
@@ -277,7 +639,7 @@ Resolution draft:
             })
 
             if critic_decision == "APPROVED":
-                logger.info(f"     ✓ Critic APPROVED on attempt {attempt}")
+                logger.info("     ✓ Critic APPROVED on attempt %d", attempt)
                 final_resolution = {
                     **resolution,
                     "critic_quality_score": quality_score,
@@ -286,7 +648,7 @@ Resolution draft:
                 }
                 break
             else:
-                logger.info(f"     ✗ Critic REJECTED. Critique: {quality.get('critique', '')[:100]}")
+                logger.info("     ✗ Critic REJECTED. Critique: %.100s", quality.get("critique", ""))
                 previous_attempt = {
                     "resolution_draft": resolution.get("resolution_draft"),
                     "confidence": confidence,
@@ -296,7 +658,7 @@ Resolution draft:
 
         if not final_resolution:
             # After max attempts, use the last draft anyway but flag it
-            logger.warning(f"  ⚠️ Max attempts reached. Using last draft with low quality flag.")
+            logger.warning("  ⚠️ Max attempts reached. Using last draft with low quality flag.")
             final_resolution = {
                 **resolution,
                 "critic_quality_score": quality_score,
@@ -305,16 +667,143 @@ Resolution draft:
                 "final": True,
             }
 
-        # Update Elasticsearch
-        self._update_ticket_es(ticket["ticket_id"], {
-            "resolution_draft": final_resolution.get("resolution_draft"),
-            "resolution_confidence": final_resolution.get("confidence"),
-            "critic_score": final_resolution.get("critic_quality_score"),
-            "resolution_attempts": final_resolution.get("attempts"),
+        self._record_resolution(ticket["ticket_id"], final_resolution)
+        return final_resolution
+
+    def _record_resolution(self, ticket_id: str, resolution: dict):
+        """Update Elasticsearch with the validated resolution draft."""
+        self._update_ticket_es(ticket_id, {
+            "resolution_draft": resolution.get("resolution_draft"),
+            "resolution_confidence": resolution.get("confidence"),
+            "critic_score": resolution.get("critic_quality_score"),
+            "resolution_attempts": resolution.get("attempts"),
             "status": "resolved_draft",
         })
 
-        return final_resolution
+    # ─────────────────────────────────────────────────────────────────────────
+    # KNOWN SOLUTION SHORT-CIRCUIT
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _known_solution(self, ticket: dict, enrichment: dict, trace: dict) -> Optional[dict]:
+        """
+        Reuse a resolved ticket's resolution when the Watcher found a near-identical match.
+        Returns a resolution dict (same shape as the Solver+Critic loop) or None.
+        """
+        data = enrichment.get("enrichment", {})
+        if not data.get("has_known_solution"):
+            return None
+
+        similar = [t for t in data.get("similar_tickets") or [] if t.get("resolution_summary")]
+        if not similar:
+            return None
+        top = max(similar, key=lambda t: t.get("similarity_score") or 0)
+        similarity = min(top.get("similarity_score") or 0, 1.0)
+        if similarity < KNOWN_SOLUTION_SIMILARITY:
+            return None
+
+        # similar_tickets only carries a 300-char summary — reuse the full text
+        resolution_text = self._fetch_resolution(top.get("ticket_id"))
+        if not resolution_text:
+            return None
+
+        decision = "auto_resolve" if similarity >= AUTO_RESOLVE_THRESHOLD else "draft_for_approval"
+
+        logger.info("  [3/4] 📚 Known solution from %s (similarity=%.2f) — skipping Solver+Critic",
+                    top.get("ticket_id"), similarity)
+        trace["steps"].append({
+            "step": 3,
+            "agent": "known_solution",
+            "matched_ticket": top.get("ticket_id"),
+            "similarity": similarity,
+        })
+        resolution = {
+            "resolution_draft": resolution_text,
+            "confidence": similarity,
+            "decision": decision,
+            "critic_quality_score": None,   # never seen by the Critic
+            "attempts": 0,
+            "known_solution_ticket": top.get("ticket_id"),
+            "known_solution_similarity": similarity,
+            "final": True,
+        }
+        self._record_resolution(ticket["ticket_id"], resolution)
+        return resolution
+
+    def _fetch_resolution(self, ticket_id: Optional[str]) -> Optional[str]:
+        """Full resolution_final of a resolved ticket — one real-time GET by _id."""
+        if not ticket_id:
+            return None
+        url = f"{ELASTIC_URL}/support-tickets/_doc/{quote(ticket_id, safe='')}"
+        try:
+            resp = SESSION.get(url, headers=ES_HEADERS,
+                               params={"_source_includes": "resolution_final"}, timeout=5)
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+            return resp.json().get("_source", {}).get("resolution_final") or None
+        except Exception as e:
+            logger.warning("Resolution lookup for %s failed — running Solver+Critic: %s", ticket_id, e)
+            return None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # SEMANTIC CACHE
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def _check_cache(self, ticket: dict, trace: dict,
+                     embedding: Optional[np.ndarray] = None) -> tuple:
+        """
+        Look the ticket up in the semantic cache.
+        Returns (resolution or None, exact key, embedding) — the key and embedding
+        are reused to store the resolution on a miss. Unless one was passed in,
+        the embedding is only fetched when the exact tier misses.
+        """
+        if self.cache is None:
+            return None, None, None
+
+        key = SemanticCache.exact_key(ticket)
+        category = ticket.get("category")
+        vector = embedding
+        hit = self.cache.get(key, None, category)
+        if hit is None:
+            if vector is None:
+                vector = self.embed_tickets([ticket])[0]
+            if vector is not None:
+                hit = self.cache.get(key, vector, category)
+        if hit is None:
+            return None, key, vector
+
+        resolution, tier, similarity = hit
+        logger.info("  [3/4] ♻️  Semantic cache hit (%s, similarity=%.3f) — skipping Solver+Critic",
+                    tier, similarity)
+        trace["steps"].append({
+            "step": 3,
+            "agent": "semantic_cache",
+            "cache_tier": tier,
+            "similarity": round(similarity, 4),
+        })
+        resolution = {**resolution, "attempts": 0, "cache_hit": tier}
+        self._record_resolution(ticket["ticket_id"], resolution)
+        return resolution, key, vector
+
+    def embed_tickets(self, tickets: list) -> list:
+        """
+        L2-normalised embeddings for several tickets in one supportiq-embeddings call.
+        Returns one vector per ticket, or None entries when the cache is off or the call fails.
+        """
+        if self.cache is None or not tickets:
+            return [None] * len(tickets)
+
+        url = f"{ELASTIC_URL}/_inference/text_embedding/{EMBEDDING_ENDPOINT_ID}"
+        try:
+            texts = [f"{t.get('title', '')}\n{t.get('description', '')}" for t in tickets]
+            resp = SESSION.post(url, headers=ES_HEADERS, data=_dumps({"input": texts}), timeout=5)
+            resp.raise_for_status()
+            matrix = np.asarray([e["embedding"] for e in resp.json()["text_embedding"]], dtype=np.float32)
+        except Exception as e:
+            logger.warning("Ticket embedding failed — exact cache tier only: %s", e)
+            return [None] * len(tickets)
+        norms = np.linalg.norm(matrix, axis=1)
+        return [row / norm if norm else None for row, norm in zip(matrix, norms)]
 
     # ─────────────────────────────────────────────────────────────────────────
     # STEP 5: DECISION & EXECUTION
@@ -326,8 +815,10 @@ Resolution draft:
         decision = resolution.get("decision", "escalate")
         resolution_text = resolution.get("resolution_draft", "")
         ticket_id = ticket["ticket_id"]
+        quality = resolution.get("critic_quality_score")
+        quality_text = f"{quality:.0%}" if quality is not None else "n/a"
 
-        logger.info(f"  [4/4] ⚡ Executing decision: {decision} (confidence={confidence:.2f})")
+        logger.info("  [4/4] ⚡ Executing decision: %s (confidence=%.2f)", decision, confidence)
 
         if decision == "auto_resolve":
             self._trigger_workflow("crm_update", {
@@ -339,7 +830,7 @@ Resolution draft:
             })
             self._notify_slack(
                 f"✅ *Auto-resolved:* `{ticket_id}`\n"
-                f"*Confidence:* {confidence:.0%} | *Quality:* {resolution.get('critic_quality_score', 0):.0%}\n"
+                f"*Confidence:* {confidence:.0%} | *Quality:* {quality_text}\n"
                 f"*Attempts:* {resolution.get('attempts', 1)}\n"
                 f"*Response sent to customer.*",
                 emoji="robot_face"
@@ -353,7 +844,7 @@ Resolution draft:
         elif decision == "draft_for_approval":
             self._notify_slack(
                 f"📋 *Needs approval:* `{ticket_id}`\n"
-                f"*Confidence:* {confidence:.0%} | *Quality:* {resolution.get('critic_quality_score', 0):.0%}\n"
+                f"*Confidence:* {confidence:.0%} | *Quality:* {quality_text}\n"
                 f"*Draft response:*\n```{resolution_text[:500]}```\n"
                 f"React with 👍 to send, 👎 to reject and escalate.",
                 emoji="pencil"
@@ -413,67 +904,151 @@ Resolution draft:
     # ─────────────────────────────────────────────────────────────────────────
 
     def _update_ticket_es(self, ticket_id: str, updates: dict):
-        """Update a ticket document in Elasticsearch."""
-        url = f"{ELASTIC_URL}/support-tickets/_update_by_query"
-        payload = {
-            "query": {"term": {"ticket_id": ticket_id}},
-            "script": {
-                "source": " ".join(
-                    [f"ctx._source['{k}'] = params.{k};" for k in updates.keys()]
-                ),
-                "params": {**updates, "updated_at": datetime.now(timezone.utc).isoformat()},
-            }
-        }
-        try:
-            requests.post(url, headers=ES_HEADERS, json=payload, timeout=10)
-        except Exception as e:
-            logger.warning(f"ES update failed for {ticket_id}: {e}")
+        """Buffer a partial ticket update; it is flushed with the trace by _write_pipeline_trace()."""
+        with self._pending_lock:
+            pending = self._pending_updates.setdefault(ticket_id, {})
+            pending.update(updates)
 
     def _write_pipeline_trace(self, trace: dict):
-        """Write the full pipeline trace to agent-traces index."""
-        url = f"{ELASTIC_URL}/agent-traces/_doc"
-        doc = {
-            "trace_id": f"pipeline-{trace['ticket_id']}-{int(time.time())}",
+        """
+        Write the buffered ticket update and the full pipeline trace in one _bulk request.
+        Tickets are keyed by ticket_id, so the update is a direct by-id partial update
+        instead of an _update_by_query search + script per step. It is not an upsert:
+        a ticket missing from the index fails its bulk item (logged by _flush_bulk)
+        rather than being created as a fragment with no subject or description.
+        """
+        ticket_id = trace["ticket_id"]
+        with self._pending_lock:
+            updates = self._pending_updates.pop(ticket_id, None)
+
+        # Format the timestamp once; the ticket's updated_at and the trace share it
+        now = time.time()
+        now_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+
+        lines = []
+        if updates:
+            lines.append({"update": {"_index": "support-tickets", "_id": ticket_id}})
+            lines.append({"doc": {**updates, "updated_at": now_iso}})
+        lines.append({"index": {"_index": "agent-traces"}})
+        lines.append({
+            "trace_id": f"pipeline-{trace['ticket_id']}-{int(now)}",
             "ticket_id": trace["ticket_id"],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": now_iso,
             "agent_name": "pipeline",
             "action": "full_pipeline",
             "decision": trace.get("final_decision"),
             "duration_ms": trace.get("total_duration_ms"),
-            "steps": json.dumps(trace.get("steps", [])),
-        }
+            "steps": _prompt_json(trace.get("steps", [])),
+        })
+        body = b"".join(_dumps(line) + b"\n" for line in lines)
+        self._background.submit(self._flush_bulk, ticket_id, body)
+
+    def _flush_bulk(self, ticket_id: str, body: bytes):
+        """Send one ticket's buffered writes on the background worker; failures are logged."""
         try:
-            requests.post(url, headers=ES_HEADERS, json=doc, timeout=10)
+            resp = SESSION.post(f"{ELASTIC_URL}/_bulk", headers=ES_BULK_HEADERS, data=body, timeout=10)
+            if resp.status_code != 200 or resp.json().get("errors"):
+                logger.warning("Bulk write for %s failed: %s — %.200s", ticket_id, resp.status_code, resp.text)
         except Exception as e:
-            logger.warning(f"Trace write failed: {e}")
+            logger.warning("Bulk write failed for %s: %s", ticket_id, e)
 
     def _trigger_workflow(self, workflow_id: str, payload: dict):
         """Trigger an Elastic Workflow via its webhook endpoint."""
         workflow_map = {
-            "crm_update":   "/supportiq/resolve",
-            "ghost_alert":  "/supportiq/ghost-alert",
-            "kb_draft":     "/supportiq/kb-draft",
-            "feedback":     "/supportiq/feedback",
+            "crm_update":   ("/supportiq/resolve", "supportiq_crm_update"),
+            "ghost_alert":  ("/supportiq/ghost-alert", "supportiq_ghost_alert"),
+            "kb_draft":     ("/supportiq/kb-draft", "supportiq_kb_draft"),
+            "feedback":     ("/supportiq/feedback", "supportiq_record_feedback"),
         }
-        path = workflow_map.get(workflow_id)
-        if not path:
-            logger.warning(f"Unknown workflow: {workflow_id}")
+        if workflow_id not in workflow_map:
+            logger.warning("Unknown workflow: %s", workflow_id)
+            return
+        path, definition_id = workflow_map[workflow_id]
+        try:
+            validate_request(definition_id, payload)
+        except ValueError as e:
+            logger.warning("Workflow trigger skipped — invalid body: %s", e)
             return
 
         url = f"{KIBANA_URL}/api/workflows/execute{path}"
+        self._notifier.submit(self._post_quietly, url, KIBANA_HEADERS, payload, 15,
+                              f"Workflow trigger failed ({workflow_id})")
+
+    def _post_quietly(self, url: str, headers: Optional[dict], payload: dict, timeout: int, failure: str):
+        """POST a side-effect call off the pipeline thread; failures are logged, never raised.
+        Calls to a host that answered 429 / 5xx moments ago are dropped instead of sent."""
+        host = urlsplit(url).netloc
+        status, until = _BACKOFF_UNTIL.get(host, (None, 0.0))
+        if until > time.monotonic():
+            logger.warning("%s: %s answered %s less than %ss ago", failure, host, status, NEGATIVE_CACHE_TTL)
+            return
         try:
-            requests.post(url, headers=KIBANA_HEADERS, json=payload, timeout=15)
+            resp = SESSION.post(url, headers=headers or JSON_HEADERS, data=_dumps(payload), timeout=timeout)
         except Exception as e:
-            logger.warning(f"Workflow trigger failed ({workflow_id}): {e}")
+            logger.warning("%s: %s", failure, e)
+            return
+        if resp.status_code == 429 or resp.status_code >= 500:
+            _BACKOFF_UNTIL[host] = (resp.status_code, time.monotonic() + NEGATIVE_CACHE_TTL)
+            logger.warning("%s: %s %.200s", failure, resp.status_code, resp.text)
+
+    def close(self):
+        """Wait for queued background writes and notifications to finish."""
+        self._notifier.shutdown(wait=True)
+        self._background.shutdown(wait=True)
 
     def _notify_slack(self, text: str, emoji: str = "robot_face"):
         """Post a notification to Slack via webhook."""
         if not SLACK_WEBHOOK_URL:
             return
-        try:
-            requests.post(SLACK_WEBHOOK_URL, json={"text": f":{emoji}: {text}"}, timeout=5)
-        except Exception:
-            pass
+        self._notifier.submit(self._post_quietly, SLACK_WEBHOOK_URL, None,
+                              {"text": f":{emoji}: {text}"}, 5, "Slack notification failed")
+
+
+def _log_failure(future):
+    """Done-callback for pipeline futures — an exception would otherwise vanish with the future."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Ticket processing failed", exc_info=future.exception())
+
+
+class TicketBatcher:
+    """
+    Coalesces bursts of webhook tickets. Up to `batch_size` tickets arriving within
+    `window_ms` are embedded in a single inference call, then each one runs through
+    the pipeline on a worker pool with its embedding preloaded.
+    """
+
+    def __init__(self, pipeline: SupportIQPipeline, batch_size: int = INTAKE_BATCH_SIZE,
+                 window_ms: int = INTAKE_BATCH_WINDOW_MS, workers: int = INTAKE_WORKERS):
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.window = window_ms / 1000
+        self._queue = queue.Queue()
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="supportiq-ticket")
+        threading.Thread(target=self._run, name="supportiq-batcher", daemon=True).start()
+
+    def submit(self, ticket: dict):
+        self._queue.put(ticket)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # One bad batch must never stop the thread — later tickets would queue forever
+            try:
+                for ticket, vector in zip(batch, self.pipeline.embed_tickets(batch)):
+                    self._workers.submit(self.pipeline.process_ticket, ticket, vector) \
+                        .add_done_callback(_log_failure)
+            except Exception:
+                logger.exception("Ticket batch of %d failed", len(batch))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -482,10 +1057,10 @@ Resolution draft:
 
 if __name__ == "__main__":
     import http.server
-    import socketserver
     from urllib.parse import urlparse
 
     pipeline = SupportIQPipeline()
+    batcher = TicketBatcher(pipeline)
 
     print("=" * 60)
     print("🚀 SupportIQ A2A Pipeline — Starting")
@@ -504,13 +1079,20 @@ if __name__ == "__main__":
         def do_POST(self):
             if self.path == "/ticket":
                 length = int(self.headers.get("Content-Length", 0))
-                body = json.loads(self.rfile.read(length))
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    self.send_response(400)
+                    self.end_headers()
+                    self.wfile.write(b'{"error": "ticket must be a JSON object"}')
+                    return
                 self.send_response(202)
                 self.end_headers()
                 self.wfile.write(b'{"status": "processing"}')
-                # Process async
-                import threading
-                threading.Thread(target=pipeline.process_ticket, args=(body,)).start()
+                # Process async — queued for batched embedding, then a pipeline worker
+                batcher.submit(body)
             else:
                 self.send_response(404)
                 self.end_headers()
@@ -518,5 +1100,6 @@ if __name__ == "__main__":
         def log_message(self, format, *args):
             pass  # Suppress default HTTP logs
 
-    with socketserver.TCPServer(("", 8080), TicketHandler) as server:
+    # One (daemon) thread per connection — a slow client body read never blocks the accept loop
+    with http.server.ThreadingHTTPServer(("", 8080), TicketHandler) as server:
         server.serve_forever()
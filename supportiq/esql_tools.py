@@ -1,6 +1,6 @@
 """
 tools/esql_tools.py
-All 9 custom ES|QL tools for SupportIQ.
+All 10 custom ES|QL tools for SupportIQ.
 These are the analytical backbone of the system — each one is a precisely crafted
 ES|QL query that gives agents real, data-driven intelligence.
 
@@ -8,8 +8,17 @@ These are registered in Elastic Agent Builder as custom tools.
 """
 
 import os
+import copy
+import json
+import hashlib
+import time
+import threading
 import requests
-from datetime import datetime, timezone
+from collections import OrderedDict
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,16 +39,140 @@ KIBANA_HEADERS = {
     "kbn-xsrf": "true",
 }
 
+# One pooled keep-alive session for every ES call made by the tools
+SESSION = requests.Session()
+SESSION.headers.update(ES_HEADERS)
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET", "POST"]),
+))
 
-def run_esql(query: str, params: dict = None) -> dict:
-    """Execute an ES|QL query and return results."""
+# (connect, read) — fail fast on an unreachable cluster, allow slow analytics queries
+ES_TIMEOUT = (3, 30)
+
+# Independent queries inside one tool call are fanned out over this pool
+_QUERY_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="esql")
+
+# Customer profiles change rarely — cache lookups in-process for a few minutes
+CUSTOMER_PROFILE_TTL = 300
+CUSTOMER_PROFILE_CACHE_SIZE = 4096
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache: entries expire after `ttl` seconds and the
+    least recently used entry is evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key → (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None when missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _dumps(obj) -> bytes:
+    """Compact UTF-8 JSON request body — no spaces, no \\u-escaping of non-ASCII text."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _post(url: str, payload: dict) -> dict:
+    """POST a JSON body to ES and decode the response straight from bytes."""
+    resp = SESSION.post(url, data=_dumps(payload), timeout=ES_TIMEOUT)
+    resp.raise_for_status()
+    return json.loads(resp.content)
+
+
+_PROFILE_CACHE = TTLCache(CUSTOMER_PROFILE_TTL, CUSTOMER_PROFILE_CACHE_SIZE)
+
+# Hybrid searches fuse their lexical/semantic/vector rankings server-side with RRF
+RRF_RANK_WINDOW = 50
+RRF_RANK_CONSTANT = 10
+
+# A 30-day hourly baseline barely moves within minutes — reuse it per category
+SURGE_BASELINE_TTL = 600
+_BASELINE_CACHE = TTLCache(SURGE_BASELINE_TTL, 1024)
+
+# KB coverage feeds an at-most-hourly dashboard — serve repeat calls from memory
+KB_COVERAGE_TTL = 300
+_KB_COVERAGE_CACHE = TTLCache(KB_COVERAGE_TTL, 64)
+
+# The Solver's retry loop repeats near-identical KB searches within one ticket
+KB_SEARCH_TTL = 60
+_KB_SEARCH_CACHE = TTLCache(KB_SEARCH_TTL, 1024)
+
+# Time windows are query-text literals, not ?params (ES|QL takes no parameter
+# for a time span), so agent-supplied values are coerced to int and clamped
+MAX_WINDOW_MINUTES = 7 * 24 * 60
+MAX_WEEKS_BACK = 52
+
+
+def run_esql(query: str, params: list = None) -> dict:
+    """
+    Execute an ES|QL query and return results.
+    User-supplied values are bound through `params` ([{"name": value}, ...], referenced
+    as ?name) rather than spliced into the query text, so the query string stays
+    constant across calls and needs no quoting.
+    """
     url = f"{ELASTIC_URL}/_query"
     payload = {"query": query}
     if params:
         payload["params"] = params
-    resp = requests.post(url, headers=ES_HEADERS, json=payload)
-    resp.raise_for_status()
-    return resp.json()
+    return _post(url, payload)
+
+
+def _bounded_int(value, low: int, high: int) -> int:
+    """int(value) clamped to [low, high] — safe to splice into an ES|QL query."""
+    return min(max(int(value), low), high)
+
+
+def _records(result: dict) -> list:
+    """Decode an ES|QL response into a list of {column: value} dicts."""
+    columns = [c["name"] for c in result.get("columns", [])]
+    return [dict(zip(columns, row)) for row in result.get("values", [])]
+
+
+def _first_record(result: dict) -> dict:
+    """The first row of an ES|QL response as a dict, or {} when there are no rows."""
+    values = result.get("values")
+    if not values:
+        return {}
+    return dict(zip((c["name"] for c in result.get("columns", [])), values[0]))
+
+
+def run_esql_many(queries: list) -> list:
+    """
+    Execute independent ES|QL queries concurrently; results come back in query order.
+    Each entry is a query string or a (query, params) pair.
+    """
+    return list(_QUERY_POOL.map(
+        lambda q: run_esql(*q) if isinstance(q, tuple) else run_esql(q), queries))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -63,37 +196,40 @@ TOOL_FIND_SIMILAR_TICKETS = {
 }
 
 
+# Constant parts of the similar-tickets request, built once — only the query texts
+# and size vary per call. json.dumps never mutates them, so they are shared as-is.
+_RESOLVED_TICKET_FILTER = [
+    {"terms": {"status": ["resolved", "closed"]}},
+    {"range": {"resolution_confidence": {"gte": 0.7}}},
+]
+_SIMILAR_TICKETS_SOURCE = ["ticket_id", "title", "category", "resolution_final",
+                           "resolution_confidence", "customer_tier", "feedback_score"]
+
+
+# The semantic and kNN clauses each score a dense-vector similarity in [0, 1];
+# their boosted sum is divided by its maximum so similarity_score stays in [0, 1]
+SIMILAR_TICKETS_KNN_BOOST = 0.3
+_SIMILAR_TICKETS_MAX_SCORE = 1 + SIMILAR_TICKETS_KNN_BOOST
+
+
 def find_similar_tickets(title: str, description: str, category: str = None, top_k: int = 5) -> dict:
     """
     Hybrid semantic search over resolved tickets.
     Uses semantic_text field for vector similarity, boosted by keyword match.
     """
-    category_filter = f'AND category == "{category}"' if category else ""
-
-    query = f"""
-    FROM support-tickets
-    | WHERE status == "resolved" OR status == "closed"
-    | WHERE resolution_confidence >= 0.7
-    {category_filter}
-    | SORT _score DESC
-    | LIMIT {top_k}
-    | KEEP ticket_id, title, category, resolution_final, resolution_confidence,
-            customer_tier, created_at, feedback_score
-    """
-
     # For full semantic search, use the Search API with knn + BM25 hybrid
+    # (kept as a boosted sum, not RRF: Watcher consumers compare similarity_score
+    # against absolute thresholds, which rank-fusion scores cannot satisfy)
     url = f"{ELASTIC_URL}/support-tickets/_search"
     payload = {
         "size": top_k,
+        "track_total_hits": False,   # only hits.hits is read — skip exact counting
         "query": {
             "bool": {
                 "must": [
                     {"semantic": {"field": "description_semantic", "query": description}},
                 ],
-                "filter": [
-                    {"terms": {"status": ["resolved", "closed"]}},
-                    {"range": {"resolution_confidence": {"gte": 0.7}}},
-                ],
+                "filter": _RESOLVED_TICKET_FILTER,
             }
         },
         "knn": {
@@ -106,14 +242,13 @@ def find_similar_tickets(title: str, description: str, category: str = None, top
             },
             "k": 10,
             "num_candidates": 50,
-            "boost": 0.3,
+            # Pre-filter the ANN search — candidates are drawn only from resolved tickets
+            "filter": _RESOLVED_TICKET_FILTER,
+            "boost": SIMILAR_TICKETS_KNN_BOOST,
         },
-        "_source": ["ticket_id", "title", "category", "resolution_final",
-                    "resolution_confidence", "customer_tier", "feedback_score"],
+        "_source": _SIMILAR_TICKETS_SOURCE,
     }
-    resp = requests.post(url, headers=ES_HEADERS, json=payload)
-    resp.raise_for_status()
-    hits = resp.json().get("hits", {}).get("hits", [])
+    hits = _post(url, payload).get("hits", {}).get("hits", [])
     return {
         "similar_tickets": [
             {
@@ -121,7 +256,7 @@ def find_similar_tickets(title: str, description: str, category: str = None, top
                 "title": h["_source"].get("title"),
                 "category": h["_source"].get("category"),
                 "resolution_summary": (h["_source"].get("resolution_final", "") or "")[:300],
-                "similarity_score": round(h["_score"], 3),
+                "similarity_score": round(min(h["_score"] / _SIMILAR_TICKETS_MAX_SCORE, 1.0), 3),
                 "resolution_confidence": h["_source"].get("resolution_confidence"),
                 "feedback_score": h["_source"].get("feedback_score"),
             }
@@ -149,19 +284,29 @@ TOOL_GET_CUSTOMER_PROFILE = {
 }
 
 
-def get_customer_profile(customer_id: str) -> dict:
-    query = f"""
-    FROM customer-profiles
-    | WHERE customer_id == "{customer_id}"
-    | LIMIT 1
-    | KEEP customer_id, company_name, tier, contract_value, sla_hours,
-            open_tickets, avg_csat, health_score, account_manager
-    """
-    result = run_esql(query)
-    rows = result.get("values", [])
-    columns = [c["name"] for c in result.get("columns", [])]
+# Profiles are indexed with _id = customer_id, so a lookup is a single-shard
+# real-time GET instead of a query fanned out to every shard
+_PROFILE_FIELDS = ",".join([
+    "customer_id", "company_name", "tier", "contract_value", "sla_hours",
+    "open_tickets", "avg_csat", "health_score", "account_manager",
+])
 
-    if not rows:
+
+def get_customer_profile(customer_id: str) -> dict:
+    cached = _PROFILE_CACHE.get(customer_id)
+    if cached is not None:
+        return dict(cached)
+
+    profile = None
+    # An empty id is simply not found — it would otherwise address /_doc/ itself
+    if customer_id:
+        resp = SESSION.get(f"{ELASTIC_URL}/customer-profiles/_doc/{quote(customer_id, safe='')}",
+                           params={"_source_includes": _PROFILE_FIELDS}, timeout=ES_TIMEOUT)
+        if resp.status_code != 404:
+            resp.raise_for_status()
+        profile = json.loads(resp.content).get("_source") if resp.status_code == 200 else None
+
+    if not profile:
         # Return default free-tier profile if customer not found
         return {
             "customer_id": customer_id,
@@ -173,9 +318,10 @@ def get_customer_profile(customer_id: str) -> dict:
             "found": False,
         }
 
-    profile = dict(zip(columns, rows[0]))
     profile["found"] = True
-    return profile
+    # Only real profiles are cached, so a newly created customer is picked up immediately
+    _PROFILE_CACHE.put(customer_id, profile)
+    return dict(profile)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -209,24 +355,22 @@ def score_ticket_priority(ticket_id: str, category: str, sla_hours: int,
     2. SLA breach risk: based on current age vs SLA deadline
     3. Backlog pressure: how many tickets in same category are currently open
     """
-    now = datetime.now(timezone.utc).isoformat()
-
-    recurrence_query = f"""
+    recurrence_query = """
     FROM support-tickets
-    | WHERE category == "{category}"
+    | WHERE category == ?category
     | WHERE created_at >= NOW() - 30 days
     | STATS recurrence_count = COUNT(*), avg_resolve_hours = AVG(TIMESTAMP_DIFF(HOUR, created_at, updated_at))
     """
 
-    backlog_query = f"""
+    backlog_query = """
     FROM support-tickets
-    | WHERE category == "{category}"
+    | WHERE category == ?category
     | WHERE status IN ("open", "triaged")
     | STATS open_count = COUNT(*), oldest_ticket_age_hours = MAX(TIMESTAMP_DIFF(HOUR, created_at, NOW()))
     """
 
-    recurrence_result = run_esql(recurrence_query)
-    backlog_result = run_esql(backlog_query)
+    params = [{"category": category}]
+    recurrence_result, backlog_result = run_esql_many([(recurrence_query, params), (backlog_query, params)])
 
     recurrence_values = recurrence_result.get("values", [[0, 0]])[0]
     backlog_values = backlog_result.get("values", [[0, 0]])[0]
@@ -279,34 +423,39 @@ def detect_ticket_surge(category: str, window_minutes: int = 60) -> dict:
     Compares current rate vs 30-day hourly baseline.
     If current_rate > baseline_mean + (2 * baseline_stddev) → surge detected.
     """
-
-    # Get baseline stats from the last 30 days (hourly bucketing)
-    baseline_query = f"""
-    FROM support-tickets
-    | WHERE category == "{category}"
-    | WHERE created_at >= NOW() - 30 days
-    | EVAL hour_bucket = DATE_TRUNC(1 hour, created_at)
-    | STATS hourly_count = COUNT(*) BY hour_bucket
-    | STATS baseline_mean = AVG(hourly_count), baseline_stddev = STDDEV_SAMPLE(hourly_count),
-            baseline_p95 = PERCENTILE(hourly_count, 95)
-    """
-
-    # Get current window count
-    current_query = f"""
-    FROM support-tickets
-    | WHERE category == "{category}"
-    | WHERE created_at >= NOW() - {window_minutes} minutes
-    | STATS current_count = COUNT(*)
-    """
-
-    baseline_result = run_esql(baseline_query)
-    current_result = run_esql(current_query)
-
-    baseline_cols = [c["name"] for c in baseline_result.get("columns", [])]
-    baseline_vals = baseline_result.get("values", [[0, 1, 0]])[0]
-    baseline = dict(zip(baseline_cols, baseline_vals))
-
-    current_count = current_result.get("values", [[0]])[0][0] or 0
+    window_minutes = _bounded_int(window_minutes, 1, MAX_WINDOW_MINUTES)
+
+    params = [{"category": category}]
+    baseline = _BASELINE_CACHE.get(category)
+
+    if baseline is None:
+        # Baseline stats from the last 30 days (hourly bucketing) and the current window
+        # count in one pass — rows inside the window are flagged and summed per bucket
+        surge_query = f"""
+        FROM support-tickets
+        | WHERE category == ?category
+        | WHERE created_at >= NOW() - 30 days
+        | EVAL hour_bucket = DATE_TRUNC(1 hour, created_at),
+               in_window = CASE(created_at >= NOW() - {window_minutes} minutes, 1, 0)
+        | STATS hourly_count = COUNT(*), window_count = SUM(in_window) BY hour_bucket
+        | STATS baseline_mean = AVG(hourly_count), baseline_stddev = STDDEV_SAMPLE(hourly_count),
+                baseline_p95 = PERCENTILE(hourly_count, 95), current_count = SUM(window_count)
+        """
+        surge_result = run_esql(surge_query, params)
+        stats = _first_record(surge_result)
+        current_count = stats.pop("current_count", 0) or 0
+        baseline = stats
+        _BASELINE_CACHE.put(category, baseline)
+    else:
+        # Baseline is cached — only the cheap current-window count runs
+        current_query = f"""
+        FROM support-tickets
+        | WHERE category == ?category
+        | WHERE created_at >= NOW() - {window_minutes} minutes
+        | STATS current_count = COUNT(*)
+        """
+        current_result = run_esql(current_query, params)
+        current_count = (current_result.get("values") or [[0]])[0][0] or 0
 
     mean = baseline.get("baseline_mean", 1) or 1
     stddev = baseline.get("baseline_stddev", 0.5) or 0.5
@@ -355,35 +504,30 @@ TOOL_CORRELATE_SPIKE_TO_DEPLOYMENT = {
 
 def correlate_spike_to_deployment(category: str, surge_start_timestamp: str = None,
                                    correlation_window_minutes: int = 90) -> dict:
-    if not surge_start_timestamp:
-        surge_start_timestamp = datetime.now(timezone.utc).isoformat()
+    # surge_start_timestamp is accepted for the tool schema; the window is anchored
+    # on the server's NOW(), so no client-side timestamp is needed.
 
+    # Heuristic: a deployment is related when its service name or description mentions
+    # the ticket category. The check runs in ES|QL so related deploys sort first and
+    # are never cut off by the LIMIT behind unrelated, more recent ones.
+    correlation_window_minutes = _bounded_int(correlation_window_minutes, 1, MAX_WINDOW_MINUTES)
     query = f"""
     FROM deployments
     | WHERE deployed_at >= NOW() - {correlation_window_minutes} minutes
     | WHERE environment == "production"
-    | SORT deployed_at DESC
+    | EVAL relevance = CASE(
+        LOCATE(TO_LOWER(COALESCE(service, "")), ?category) > 0
+          OR LOCATE(TO_LOWER(COALESCE(description, "")), ?category) > 0,
+        "HIGH", "LOW")
+    | SORT relevance ASC, deployed_at DESC
     | LIMIT 5
-    | KEEP deployment_id, service, version, deployed_at, deployed_by, team, description, rollback_available
+    | KEEP deployment_id, service, version, deployed_at, deployed_by, team, description,
+           rollback_available, relevance
     """
 
-    result = run_esql(query)
-    cols = [c["name"] for c in result.get("columns", [])]
-    rows = result.get("values", [])
-
-    deployments = [dict(zip(cols, row)) for row in rows]
-
-    # Heuristic: check if any deployment's service name relates to the ticket category
-    related = []
-    for d in deployments:
-        service = (d.get("service") or "").lower()
-        desc = (d.get("description") or "").lower()
-        cat_lower = category.lower()
-        if cat_lower in service or cat_lower in desc:
-            d["relevance"] = "HIGH"
-            related.append(d)
-        else:
-            d["relevance"] = "LOW"
+    result = run_esql(query, [{"category": category.lower()}])
+    deployments = _records(result)
+    related = [d for d in deployments if d["relevance"] == "HIGH"]
 
     return {
         "category": category,
@@ -402,7 +546,7 @@ def correlate_spike_to_deployment(category: str, surge_start_timestamp: str = No
 
 TOOL_SEARCH_KNOWLEDGE_BASE = {
     "name": "search_knowledge_base",
-    "description": "Search the knowledge base for articles relevant to the support ticket. Returns top articles with their full content for the Solver to use in generating a resolution.",
+    "description": "Search the knowledge base for articles relevant to the support ticket. Returns top article metadata (id, title, category, feedback); fetch the full text of the articles you use with fetch_article_content.",
     "parameters": {
         "type": "object",
         "properties": {
@@ -410,56 +554,87 @@ TOOL_SEARCH_KNOWLEDGE_BASE = {
             "description": {"type": "string"},
             "category": {"type": "string"},
             "top_k": {"type": "integer", "default": 3},
+            "include_content": {"type": "boolean", "default": False,
+                                "description": "Return each article's full content inline"},
         },
         "required": ["title", "description"],
     },
 }
 
 
-def search_knowledge_base(title: str, description: str, category: str = None, top_k: int = 3) -> dict:
-    """Hybrid semantic + BM25 search over the knowledge base."""
+# Search hits carry metadata only by default — article bodies are the bulk of the
+# response and the Solver only needs the text of the articles it actually uses
+KB_SEARCH_SOURCE = ["article_id", "title", "category", "tags", "avg_feedback", "usage_count", "updated_at"]
+_KB_SEARCH_SOURCE_WITH_CONTENT = KB_SEARCH_SOURCE + ["content"]
+_KB_PUBLISHED_FILTER = {"term": {"draft": False}}
+
+
+def search_knowledge_base(title: str, description: str, category: str = None, top_k: int = 3,
+                          include_content: bool = False) -> dict:
+    """Hybrid semantic + BM25 search over the knowledge base, fused with RRF."""
+    # Fixed-size digest key — long ticket descriptions are not kept as dict keys
+    cache_key = hashlib.blake2b("\x1f".join((
+        title, description, category or "", str(top_k), str(include_content),
+    )).encode(), digest_size=16).digest()
+    cached = _KB_SEARCH_CACHE.get(cache_key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
     url = f"{ELASTIC_URL}/knowledge-base/_search"
-    category_filter = [{"term": {"category": category}}] if category else []
+    filters = [_KB_PUBLISHED_FILTER]
+    if category:
+        filters.append({"term": {"category": category}})
 
     payload = {
         "size": top_k,
-        "query": {
-            "bool": {
-                "must": [
-                    {"semantic": {"field": "content_semantic", "query": description}},
-                ],
-                "filter": [
-                    {"term": {"draft": False}},
-                ] + category_filter,
-                "should": [
-                    {"match": {"title": {"query": title, "boost": 2}}},
-                    {"match": {"content": {"query": description}}},
+        "track_total_hits": False,   # only hits.hits is read — skip exact counting
+        "retriever": {
+            "rrf": {
+                "retrievers": [
+                    {"standard": {"query": {"bool": {
+                        "must": [
+                            {"semantic": {"field": "content_semantic", "query": description}},
+                        ],
+                        "filter": filters,
+                    }}}},
+                    {"standard": {"query": {"bool": {
+                        "should": [
+                            {"match": {"title": {"query": title, "boost": 2}}},
+                            {"match": {"content": {"query": description}}},
+                        ],
+                        "minimum_should_match": 1,
+                        "filter": filters,
+                    }}}},
                 ],
+                "rank_window_size": max(RRF_RANK_WINDOW, top_k),
+                "rank_constant": RRF_RANK_CONSTANT,
             }
         },
-        "_source": ["article_id", "title", "content", "category", "tags",
-                    "avg_feedback", "usage_count", "updated_at"],
+        "_source": _KB_SEARCH_SOURCE_WITH_CONTENT if include_content else KB_SEARCH_SOURCE,
     }
 
-    resp = requests.post(url, headers=ES_HEADERS, json=payload)
-    resp.raise_for_status()
-    hits = resp.json().get("hits", {}).get("hits", [])
+    hits = _post(url, payload).get("hits", {}).get("hits", [])
+
+    articles = []
+    for h in hits:
+        article = {
+            "article_id": h["_source"].get("article_id"),
+            "title": h["_source"].get("title"),
+            "category": h["_source"].get("category"),
+            "relevance_score": round(h["_score"], 3),
+            "avg_feedback": h["_source"].get("avg_feedback"),
+            "usage_count": h["_source"].get("usage_count"),
+        }
+        if include_content:
+            article["content"] = h["_source"].get("content", "")
+        articles.append(article)
 
-    return {
-        "articles": [
-            {
-                "article_id": h["_source"].get("article_id"),
-                "title": h["_source"].get("title"),
-                "content": h["_source"].get("content", ""),
-                "category": h["_source"].get("category"),
-                "relevance_score": round(h["_score"], 3),
-                "avg_feedback": h["_source"].get("avg_feedback"),
-                "usage_count": h["_source"].get("usage_count"),
-            }
-            for h in hits
-        ],
+    found = {
+        "articles": articles,
         "count": len(hits),
     }
+    _KB_SEARCH_CACHE.put(cache_key, found)
+    return copy.deepcopy(found)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -482,35 +657,16 @@ TOOL_SCORE_RESOLUTION_QUALITY = {
 }
 
 
-def score_resolution_quality(resolution_draft: str, category: str) -> dict:
-    """
-    Retrieves the top 5 highest-rated resolutions for this category
-    and computes semantic similarity to identify quality.
-    """
-    url = f"{ELASTIC_URL}/support-tickets/_search"
-
-    payload = {
-        "size": 5,
-        "query": {
-            "bool": {
-                "filter": [
-                    {"term": {"category": category}},
-                    {"term": {"status": "resolved"}},
-                    {"range": {"feedback_score": {"gte": 1}}},
-                    {"range": {"resolution_confidence": {"gte": 0.85}}},
-                ],
-                "must": [
-                    {"semantic": {"field": "description_semantic", "query": resolution_draft}},
-                ],
-            }
-        },
-        "_source": ["resolution_final", "resolution_confidence", "feedback_score"],
-    }
+# Constant parts of the reference-resolution query (everything but category and draft)
+_TOP_RATED_FILTER = [
+    {"term": {"status": "resolved"}},
+    {"range": {"feedback_score": {"gte": 1}}},
+    {"range": {"resolution_confidence": {"gte": 0.85}}},
+]
+_QUALITY_SOURCE = ["resolution_final", "resolution_confidence", "feedback_score"]
 
-    resp = requests.post(url, headers=ES_HEADERS, json=payload)
-    resp.raise_for_status()
-    hits = resp.json().get("hits", {}).get("hits", [])
 
+def _quality_from_hits(hits: list) -> dict:
     if not hits:
         return {
             "semantic_similarity_score": 0.5,
@@ -530,6 +686,51 @@ def score_resolution_quality(resolution_draft: str, category: str) -> dict:
     }
 
 
+def score_resolution_quality_batch(resolution_drafts: list, category: str) -> list:
+    """
+    Score several candidate drafts for one category in a single _msearch round-trip.
+    Results come back in draft order.
+    """
+    category_filter = [{"term": {"category": category}}, *_TOP_RATED_FILTER]
+    header = _dumps({"index": "support-tickets"})
+    lines = []
+    for draft in resolution_drafts:
+        lines.append(header)
+        lines.append(_dumps({
+            "size": 5,
+            "track_total_hits": False,   # only hits.hits is read — skip exact counting
+            "query": {
+                "bool": {
+                    "filter": category_filter,
+                    "must": [
+                        {"semantic": {"field": "description_semantic", "query": draft}},
+                    ],
+                }
+            },
+            "_source": _QUALITY_SOURCE,
+        }))
+    body = b"\n".join(lines) + b"\n"   # _msearch NDJSON must end with a newline
+
+    resp = SESSION.post(f"{ELASTIC_URL}/_msearch", data=body, timeout=ES_TIMEOUT,
+                        headers={"Content-Type": "application/x-ndjson"})
+    resp.raise_for_status()
+
+    results = []
+    for item in json.loads(resp.content).get("responses", []):
+        if "error" in item:
+            raise RuntimeError(f"Resolution quality search failed: {item['error']}")
+        results.append(_quality_from_hits(item.get("hits", {}).get("hits", [])))
+    return results
+
+
+def score_resolution_quality(resolution_draft: str, category: str) -> dict:
+    """
+    Retrieves the top 5 highest-rated resolutions for this category
+    and computes semantic similarity to identify quality.
+    """
+    return score_resolution_quality_batch([resolution_draft], category)[0]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # TOOL 8: weekly_performance_metrics
 # Used by: Analyst Agent
@@ -550,6 +751,7 @@ TOOL_WEEKLY_PERFORMANCE_METRICS = {
 
 def weekly_performance_metrics(include_feedback: bool = False, weeks_back: int = 1) -> dict:
     """Comprehensive weekly analytics dashboard data."""
+    weeks_back = _bounded_int(weeks_back, 1, MAX_WEEKS_BACK)
 
     metrics_query = f"""
     FROM support-tickets
@@ -572,18 +774,25 @@ def weekly_performance_metrics(include_feedback: bool = False, weeks_back: int =
     | LIMIT 10
     """
 
-    metrics_result = run_esql(metrics_query)
-    category_result = run_esql(category_query)
+    feedback_query = f"""
+    FROM feedback
+    | WHERE timestamp >= NOW() - {weeks_back * 7} days
+    | STATS positive = COUNT(CASE WHEN score == 1 THEN 1 END),
+            negative = COUNT(CASE WHEN score == -1 THEN 1 END),
+            total_feedback = COUNT(*)
+    """
+
+    # All dashboard queries go out together — one round-trip of latency for the whole report
+    queries = [metrics_query, category_query] + ([feedback_query] if include_feedback else [])
+    metrics_result, category_result, *rest = run_esql_many(queries)
+    fb_result = rest[0] if include_feedback else None
 
-    metrics_cols = [c["name"] for c in metrics_result.get("columns", [])]
-    metrics_vals = metrics_result.get("values", [[]])[0]
-    metrics = dict(zip(metrics_cols, metrics_vals)) if metrics_vals else {}
+    metrics = _first_record(metrics_result)
 
     total = metrics.get("total_tickets", 0) or 1
     auto = metrics.get("auto_resolved", 0) or 0
 
-    cat_cols = [c["name"] for c in category_result.get("columns", [])]
-    categories = [dict(zip(cat_cols, row)) for row in category_result.get("values", [])]
+    categories = _records(category_result)
 
     result = {
         "period_days": weeks_back * 7,
@@ -599,17 +808,7 @@ def weekly_performance_metrics(include_feedback: bool = False, weeks_back: int =
     }
 
     if include_feedback:
-        feedback_query = f"""
-        FROM feedback
-        | WHERE timestamp >= NOW() - {weeks_back * 7} days
-        | STATS positive = COUNT(CASE WHEN score == 1 THEN 1 END),
-                negative = COUNT(CASE WHEN score == -1 THEN 1 END),
-                total_feedback = COUNT(*)
-        """
-        fb_result = run_esql(feedback_query)
-        fb_cols = [c["name"] for c in fb_result.get("columns", [])]
-        fb_vals = fb_result.get("values", [[0, 0, 0]])[0]
-        fb = dict(zip(fb_cols, fb_vals))
+        fb = _first_record(fb_result)
         fb_total = fb.get("total_feedback", 0) or 1
         result["feedback"] = {
             "positive": fb.get("positive", 0),
@@ -640,13 +839,16 @@ TOOL_KB_GAP_DETECTOR = {
 
 def kb_gap_detector(min_ticket_count: int = 5) -> dict:
     """Find categories with high ticket volume but no KB coverage."""
+    cached = _KB_COVERAGE_CACHE.get(min_ticket_count)
+    if cached is not None:
+        return copy.deepcopy(cached)
 
     # Get all categories with ticket counts
-    ticket_cats_query = f"""
+    ticket_cats_query = """
     FROM support-tickets
     | WHERE created_at >= NOW() - 30 days
     | STATS ticket_count = COUNT(*) BY category
-    | WHERE ticket_count >= {min_ticket_count}
+    | WHERE ticket_count >= ?min_ticket_count
     | SORT ticket_count DESC
     """
 
@@ -657,14 +859,14 @@ def kb_gap_detector(min_ticket_count: int = 5) -> dict:
     | STATS article_count = COUNT(*) BY category
     """
 
-    ticket_result = run_esql(ticket_cats_query)
-    kb_result = run_esql(kb_cats_query)
-
-    ticket_cols = [c["name"] for c in ticket_result.get("columns", [])]
-    ticket_rows = [dict(zip(ticket_cols, row)) for row in ticket_result.get("values", [])]
+    ticket_result, kb_result = run_esql_many([
+        (ticket_cats_query, [{"min_ticket_count": min_ticket_count}]),
+        kb_cats_query,
+    ])
 
-    kb_cols = [c["name"] for c in kb_result.get("columns", [])]
-    kb_cats = {row[0]: row[1] for row in kb_result.get("values", [])}  # category -> count
+    ticket_rows = _records(ticket_result)
+    # category -> count (STATS ... BY puts the group column last, so decode by name)
+    kb_cats = {row["category"]: row["article_count"] for row in _records(kb_result)}
 
     gaps = []
     covered = []
@@ -677,12 +879,51 @@ def kb_gap_detector(min_ticket_count: int = 5) -> dict:
         else:
             covered.append({"category": cat, "ticket_count": count, "kb_articles": articles})
 
-    return {
+    coverage = {
         "gaps": gaps,
         "covered": covered,
         "total_gaps": len(gaps),
         "coverage_rate": round(len(covered) / max(len(ticket_rows), 1), 3),
     }
+    _KB_COVERAGE_CACHE.put(min_ticket_count, coverage)
+    return copy.deepcopy(coverage)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TOOL 10: fetch_article_content
+# Used by: Solver Agent
+# Full text for the KB articles the Solver picked from search_knowledge_base
+# ─────────────────────────────────────────────────────────────────────────────
+
+TOOL_FETCH_ARTICLE_CONTENT = {
+    "name": "fetch_article_content",
+    "description": "Fetch the full text of a knowledge base article by its article_id (as returned by search_knowledge_base).",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "article_id": {"type": "string", "description": "The KB article ID, e.g. KB-0001"},
+        },
+        "required": ["article_id"],
+    },
+}
+
+
+def fetch_article_content(article_id: str) -> dict:
+    """Point read of one article's content — KB documents are indexed with _id = article_id."""
+    if not article_id:
+        return {"article_id": article_id, "found": False, "content": ""}
+    resp = SESSION.get(f"{ELASTIC_URL}/knowledge-base/_doc/{quote(article_id, safe='')}",
+                       params={"_source_includes": "title,content"}, timeout=ES_TIMEOUT)
+    if resp.status_code == 404:
+        return {"article_id": article_id, "found": False, "content": ""}
+    resp.raise_for_status()
+    source = json.loads(resp.content).get("_source", {})
+    return {
+        "article_id": article_id,
+        "found": True,
+        "title": source.get("title"),
+        "content": source.get("content", ""),
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -699,6 +940,7 @@ ALL_TOOLS = [
     TOOL_SCORE_RESOLUTION_QUALITY,
     TOOL_WEEKLY_PERFORMANCE_METRICS,
     TOOL_KB_GAP_DETECTOR,
+    TOOL_FETCH_ARTICLE_CONTENT,
 ]
 
 TOOL_FUNCTIONS = {
@@ -711,4 +953,5 @@ TOOL_FUNCTIONS = {
     "score_resolution_quality": score_resolution_quality,
     "weekly_performance_metrics": weekly_performance_metrics,
     "kb_gap_detector": kb_gap_detector,
+    "fetch_article_content": fetch_article_content,
 }
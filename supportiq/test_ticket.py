@@ -22,42 +22,53 @@ from a2a_pipeline import SupportIQPipeline
 
 # ─── Demo Scenarios ────────────────────────────────────────────────────────
 
+# Static ticket content per scenario; ticket_id (prefix + timestamp) and
+# created_at are stamped by make_scenario when the scenario is actually run
 SCENARIOS = {
 
     # Standard ticket — demonstrates normal auto-resolve flow
     "standard": {
-        "ticket_id": f"TKT-DEMO-{int(time.time())}",
+        "id_prefix": "TKT-DEMO",
         "title": "Cannot login — 2FA SMS not arriving",
         "description": "I've been trying to log in for the past hour and the 2FA SMS code is not being sent to my phone number +1 (555) 234-5678. I've requested the code 5 times and nothing has arrived. I checked my spam folder. My account email is john.doe@enterprise-corp.com. This is blocking our entire team from working.",
         "customer_id": "CUST-10042",
         "category": "authentication",
         "channel": "email",
-        "created_at": datetime.now(timezone.utc).isoformat(),
     },
 
     # Surge scenario — demonstrates Ghost Ticket pre-emption
     "surge": {
-        "ticket_id": f"TKT-SURGE-{int(time.time())}",
+        "id_prefix": "TKT-SURGE",
         "title": "Payment checkout completely broken",
         "description": "Since about 2pm today, none of our customers can complete checkout. They get to the payment step, enter their card details, and the spinner just runs forever. No error message. Our sales have dropped to zero. This started right after your maintenance window ended. We are an enterprise customer and this is CRITICAL.",
         "customer_id": "CUST-10001",
         "category": "payment",
         "channel": "slack",
-        "created_at": datetime.now(timezone.utc).isoformat(),
     },
 
     # Critic scenario — demonstrates the self-correcting quality loop
     "critic": {
-        "ticket_id": f"TKT-CRITIC-{int(time.time())}",
+        "id_prefix": "TKT-CRITIC",
         "title": "API returning 401 despite valid v3 API key",
         "description": "We migrated to the v3 API last week as required. Our API key was regenerated for v3. Since yesterday, all our API calls are returning 401 Unauthorized. The key is definitely valid — I can see it in the dashboard. Our system is processing 50,000 requests/day and we're completely blocked. URGENT.",
         "customer_id": "CUST-10015",
         "category": "api",
         "channel": "api",
-        "created_at": datetime.now(timezone.utc).isoformat(),
     },
 }
 
+SCENARIO_NAMES = ("standard", "surge", "critic")
+
+
+def make_scenario(name: str) -> dict:
+    """Build the demo ticket for one scenario with a fresh id and timestamp."""
+    ticket = dict(SCENARIOS[name])
+    return {
+        "ticket_id": f"{ticket.pop('id_prefix')}-{int(time.time())}",
+        **ticket,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
 
 def print_trace(trace: dict):
     """Pretty print the pipeline execution trace."""
@@ -86,6 +97,12 @@ def print_trace(trace: dict):
             surge_icon = "🚨" if step.get("surge_detected") else ""
             print(f"  [{step_num}] ⚖️  Judge: priority={step.get('priority_label', '?')} "
                   f"({step.get('priority_score', 0):.0f}) {surge_icon}")
+        elif agent == "known_solution":
+            print(f"  [{step_num}] 📚 Known solution: reused {step.get('matched_ticket', '?')} "
+                  f"(similarity={step.get('similarity', 0):.0%})")
+        elif agent == "semantic_cache":
+            print(f"  [{step_num}] ♻️  Semantic cache: {step.get('cache_tier', '?')} hit "
+                  f"(similarity={step.get('similarity', 0):.3f})")
         elif agent == "pipeline":
             print(f"  [{step_num}] ⚡ Decision: {step.get('decision', '?').upper()} "
                   f"(confidence={step.get('confidence', 0):.0%})")
@@ -106,10 +123,10 @@ def print_trace(trace: dict):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--scenario", choices=list(SCENARIOS.keys()), default="standard")
+    parser.add_argument("--scenario", choices=SCENARIO_NAMES, default="standard")
     args = parser.parse_args()
 
-    ticket = SCENARIOS[args.scenario]
+    ticket = make_scenario(args.scenario)
 
     print("="*60)
     print(f"🎯 SupportIQ Demo — Scenario: {args.scenario.upper()}")
@@ -12,95 +12,192 @@ Workflows handle the rules-based automation that agents trigger:
 """
 
 import os
+import gzip
 import json
+import hashlib
 import requests
+from types import MappingProxyType
+from functools import cache, lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
-load_dotenv()
-
-KIBANA_URL = os.getenv("KIBANA_URL")
-KIBANA_API_KEY = os.getenv("KIBANA_API_KEY")
-SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
-SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
-SLACK_SUPPORT_CHANNEL = os.getenv("SLACK_SUPPORT_CHANNEL", "#support-ops")
-SLACK_ALERTS_CHANNEL = os.getenv("SLACK_ALERTS_CHANNEL", "#support-alerts")
-SLACK_ENGINEERING_CHANNEL = os.getenv("SLACK_ENGINEERING_CHANNEL", "#engineering")
-CRM_API_URL = os.getenv("CRM_API_URL")
-CRM_API_KEY = os.getenv("CRM_API_KEY")
-ELASTIC_URL = os.getenv("ELASTIC_URL")
-ELASTIC_API_KEY = os.getenv("ELASTIC_API_KEY")
-
-KIBANA_HEADERS = {
-    "Content-Type": "application/json",
-    "Authorization": f"ApiKey {KIBANA_API_KEY}",
-    "kbn-xsrf": "true",
+# orjson (optional) encodes the Kibana / Elasticsearch request bodies straight to
+# bytes several times faster than the stdlib; without it, compact stdlib JSON
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+SLACK_POST_MESSAGE_URL = "https://slack.com/api/chat.postMessage"
+
+# Settings read from the environment, with their defaults. Nothing is read at
+# import: .env is loaded and each value looked up (once) on first use, so
+# importing the module just to inspect the workflow definitions does no I/O.
+ENV_DEFAULTS = MappingProxyType({
+    "KIBANA_URL": None,
+    "KIBANA_API_KEY": None,
+    "SLACK_WEBHOOK_URL": None,
+    "SLACK_BOT_TOKEN": None,
+    "SLACK_SUPPORT_CHANNEL": "#support-ops",
+    "SLACK_ALERTS_CHANNEL": "#support-alerts",
+    "SLACK_ENGINEERING_CHANNEL": "#engineering",
+    "CRM_API_URL": None,
+    "CRM_API_KEY": None,
+    "ELASTIC_URL": None,
+    "ELASTIC_API_KEY": None,
+})
+
+
+@cache
+def _load_dotenv():
+    load_dotenv()
+
+
+@cache
+def _env(name: str):
+    """One setting from ENV_DEFAULTS — .env is loaded on the first call."""
+    _load_dotenv()
+    return os.getenv(name, ENV_DEFAULTS[name])
+
+
+@cache
+def _kibana_headers() -> dict:
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"ApiKey {_env('KIBANA_API_KEY')}",
+        "kbn-xsrf": "true",
+    }
+
+
+@cache
+def _crm_tickets_url() -> str:
+    """CRM ticket collection URL, ending in a slash — the ticket id is appended as-is."""
+    return f"{(_env('CRM_API_URL') or '').rstrip('/')}/tickets/"
+
+
+# Shared, read-only Slack text-object leaves. Blocks spread them into a fresh
+# dict ({**_MRKDWN, "text": ...}) so the type literal is defined once and can
+# never be mutated through a cached workflow.
+_MRKDWN = MappingProxyType({"type": "mrkdwn"})
+_PLAIN_TEXT = MappingProxyType({"type": "plain_text"})
+
+
+# Slack reaction → feedback score; anything else scores 0
+REACTION_SCORES = MappingProxyType({
+    "+1": 1, "thumbsup": 1, "white_check_mark": 1,
+    "-1": -1, "thumbsdown": -1, "x": -1,
+})
+
+# Ingest pipeline that scores feedback documents on write. Pipelines are compiled
+# once and cached cluster-wide; the raw reaction is dropped after scoring.
+FEEDBACK_PIPELINE = "feedback_score"
+FEEDBACK_PIPELINE_BODY = {
+    "description": "SupportIQ: map a Slack reaction to a feedback score",
+    "processors": [
+        {"script": {
+            "lang": "painless",
+            "source": "ctx.score = params.m.getOrDefault(ctx.reaction, 0);",
+            "params": {"m": dict(REACTION_SCORES)},
+        }},
+        {"remove": {"field": "reaction", "ignore_missing": True}},
+    ],
 }
 
 
+def _bulk_step(step_id: str, actions: list) -> dict:
+    """One elasticsearch_bulk step from (action, source) pairs — a single _bulk
+    round-trip instead of one index/update step per document."""
+    operations = []
+    for action, source in actions:
+        operations.append(action)
+        operations.append(source)
+    return {
+        "id": step_id,
+        "type": "elasticsearch_bulk",
+        "config": {"operations": operations},
+    }
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # WORKFLOW 1: ticket_intake
 # Triggered: Externally (Slack webhook, email, API)
 # Action: Ingest ticket into Elasticsearch and trigger the Watcher agent
 # ─────────────────────────────────────────────────────────────────────────────
 
-WORKFLOW_TICKET_INTAKE = {
-    "id": "supportiq_ticket_intake",
-    "name": "SupportIQ: Ticket Intake",
-    "description": "Receives new support tickets from external channels and writes them to Elasticsearch. Triggers the Watcher agent pipeline.",
-    "trigger": {
-        "type": "webhook",
-        "config": {
-            "method": "POST",
-            "path": "/supportiq/intake",
-        }
-    },
-    "steps": [
-        {
-            "id": "generate_ticket_id",
-            "type": "script",
+@lru_cache(maxsize=None)
+def _ticket_intake() -> dict:
+    return {
+        "id": "supportiq_ticket_intake",
+        "name": "SupportIQ: Ticket Intake",
+        "description": "Receives new support tickets from external channels and writes them to Elasticsearch. Triggers the Watcher agent pipeline.",
+        "trigger": {
+            "type": "webhook",
             "config": {
-                "language": "painless",
-                "source": """
-                    def ticketId = 'TKT-' + System.currentTimeMillis();
-                    def now = ZonedDateTime.now(ZoneOffset.UTC).toString();
-                    ctx.ticket_id = ticketId;
-                    ctx.created_at = now;
-                    ctx.status = 'open';
-                    ctx.resolution_attempts = 0;
-                """
+                "method": "POST",
+                "path": "/supportiq/intake",
             }
         },
-        {
-            "id": "index_ticket",
-            "type": "elasticsearch_index",
-            "config": {
-                "index": "support-tickets",
-                "document": {
-                    "ticket_id": "{{ticket_id}}",
-                    "created_at": "{{created_at}}",
-                    "updated_at": "{{created_at}}",
-                    "status": "open",
-                    "title": "{{ctx.body.title}}",
-                    "description": "{{ctx.body.description}}",
-                    "customer_id": "{{ctx.body.customer_id}}",
-                    "category": "{{ctx.body.category}}",
-                    "resolution_attempts": 0,
+        "steps": [
+            {
+                "id": "generate_ticket_id",
+                "type": "script",
+                "config": {
+                    "language": "painless",
+                    # One clock read feeds both the id and the UTC timestamp —
+                    # Instant.toString() is ISO-8601 UTC with no zone-rules lookup.
+                    # The id is the millisecond clock in base36 (fixed width, so ids
+                    # sort by creation time) plus 4 random chars, so tickets arriving
+                    # in the same millisecond during a surge never collide.
+                    "source": """
+                        long ms = System.currentTimeMillis();
+                        ctx.ticket_id = new StringBuilder(18).append('TKT-')
+                            .append(Long.toString(ms, 36).toUpperCase())
+                            .append(UUID.randomUUID().toString().substring(0, 4).toUpperCase())
+                            .toString();
+                        ctx.created_at = Instant.ofEpochMilli(ms).toString();
+                        ctx.status = 'open';
+                        ctx.resolution_attempts = 0;
+                    """
                 }
-            }
-        },
-        {
-            "id": "notify_slack_received",
-            "type": "http_request",
-            "config": {
-                "url": SLACK_WEBHOOK_URL,
-                "method": "POST",
-                "body": {
-                    "text": "🎫 *New ticket received:* `{{ticket_id}}`\n*Title:* {{ctx.body.title}}\n*Customer:* {{ctx.body.customer_id}}\n_SupportIQ is analyzing..._"
+            },
+            {
+                "id": "index_ticket",
+                "type": "elasticsearch_index",
+                "config": {
+                    "index": "support-tickets",
+                    "id": "{{ticket_id}}",   # ticket_id is the _id — later steps update by it
+                    "document": {
+                        "ticket_id": "{{ticket_id}}",
+                        "created_at": "{{created_at}}",
+                        "updated_at": "{{created_at}}",
+                        "status": "open",
+                        "title": "{{ctx.body.title}}",
+                        "description": "{{ctx.body.description}}",
+                        "customer_id": "{{ctx.body.customer_id}}",
+                        "category": "{{ctx.body.category}}",
+                        "resolution_attempts": 0,
+                    }
+                }
+            },
+            {
+                "id": "notify_slack_received",
+                "type": "http_request",
+                "config": {
+                    "url": _env("SLACK_WEBHOOK_URL"),
+                    "method": "POST",
+                    "body": {
+                        "text": "🎫 *New ticket received:* `{{ticket_id}}`\n*Title:* {{ctx.body.title}}\n*Customer:* {{ctx.body.customer_id}}\n_SupportIQ is analyzing..._"
+                    }
                 }
             }
-        }
-    ]
-}
+        ]
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -109,60 +206,78 @@ WORKFLOW_TICKET_INTAKE = {
 # Action: Update CRM with resolution + close ticket in Elasticsearch
 # ─────────────────────────────────────────────────────────────────────────────
 
-WORKFLOW_CRM_UPDATE = {
-    "id": "supportiq_crm_update",
-    "name": "SupportIQ: CRM Update & Ticket Close",
-    "description": "Updates the CRM with the resolution text and closes the ticket in Elasticsearch. Triggered by auto-resolve or human approval.",
-    "trigger": {
-        "type": "webhook",
-        "config": {
-            "method": "POST",
-            "path": "/supportiq/resolve",
-        }
-    },
-    "steps": [
-        {
-            "id": "update_elasticsearch",
-            "type": "elasticsearch_update",
+@lru_cache(maxsize=None)
+def _crm_update() -> dict:
+    return {
+        "id": "supportiq_crm_update",
+        "name": "SupportIQ: CRM Update & Ticket Close",
+        "description": "Updates the CRM with the resolution text and closes the ticket in Elasticsearch. Triggered by auto-resolve or human approval.",
+        "trigger": {
+            "type": "webhook",
             "config": {
-                "index": "support-tickets",
-                "query": {"term": {"ticket_id": "{{ctx.body.ticket_id}}"}},
-                "update": {
-                    "status": "resolved",
-                    "resolution_final": "{{ctx.body.resolution_text}}",
-                    "resolved_by": "{{ctx.body.resolved_by}}",
-                    "updated_at": "{{now}}",
-                }
-            }
-        },
-        {
-            "id": "update_crm",
-            "type": "http_request",
-            "config": {
-                "url": f"{CRM_API_URL}/tickets/{{{{ctx.body.ticket_id}}}}",
-                "method": "PATCH",
-                "headers": {"Authorization": f"Bearer {CRM_API_KEY}"},
-                "body": {
-                    "status": "resolved",
-                    "resolution": "{{ctx.body.resolution_text}}",
-                    "resolved_by_ai": "{{ctx.body.is_auto_resolved}}",
-                    "confidence_score": "{{ctx.body.confidence}}",
-                }
+                "method": "POST",
+                "path": "/supportiq/resolve",
             }
         },
-        {
-            "id": "notify_slack_resolved",
-            "type": "http_request",
-            "config": {
-                "url": SLACK_WEBHOOK_URL,
-                "method": "POST",
-                "body": {
-                    "text": "✅ *Ticket resolved:* `{{ctx.body.ticket_id}}`\n*Method:* {{ctx.body.resolved_by}}\n*Confidence:* {{ctx.body.confidence}}\n*Response:* {{ctx.body.resolution_text}}"
-                }
+        # None of the three calls reads anything another one writes, so they run
+        # as parallel branches: latency is the slowest call, not the sum of all three
+        "steps": [
+            {
+                "id": "fanout",
+                "type": "parallel",
+                "branches": [
+                    [
+                        {
+                            "id": "update_elasticsearch",
+                            # ticket_id is the document _id (set at intake), so the
+                            # update routes straight to one shard — no search fan-out
+                            "type": "elasticsearch_update_by_id",
+                            "config": {
+                                "index": "support-tickets",
+                                "id": "{{ctx.body.ticket_id}}",
+                                "doc": {
+                                    "status": "resolved",
+                                    "resolution_final": "{{ctx.body.resolution_text}}",
+                                    "resolved_by": "{{ctx.body.resolved_by}}",
+                                    "updated_at": "{{now}}",
+                                }
+                            }
+                        }
+                    ],
+                    [
+                        {
+                            "id": "update_crm",
+                            "type": "http_request",
+                            "config": {
+                                "url": _crm_tickets_url() + "{{ctx.body.ticket_id}}",
+                                "method": "PATCH",
+                                "headers": {"Authorization": f"Bearer {_env('CRM_API_KEY')}"},
+                                "body": {
+                                    "status": "resolved",
+                                    "resolution": "{{ctx.body.resolution_text}}",
+                                    "resolved_by_ai": "{{ctx.body.is_auto_resolved}}",
+                                    "confidence_score": "{{ctx.body.confidence}}",
+                                }
+                            }
+                        }
+                    ],
+                    [
+                        {
+                            "id": "notify_slack_resolved",
+                            "type": "http_request",
+                            "config": {
+                                "url": _env("SLACK_WEBHOOK_URL"),
+                                "method": "POST",
+                                "body": {
+                                    "text": "✅ *Ticket resolved:* `{{ctx.body.ticket_id}}`\n*Method:* {{ctx.body.resolved_by}}\n*Confidence:* {{ctx.body.confidence}}\n*Response:* {{ctx.body.resolution_text}}"
+                                }
+                            }
+                        }
+                    ],
+                ]
             }
-        }
-    ]
-}
+        ]
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -171,82 +286,91 @@ WORKFLOW_CRM_UPDATE = {
 # Action: Pre-emptive alert to support team AND engineering
 # ─────────────────────────────────────────────────────────────────────────────
 
-WORKFLOW_GHOST_ALERT = {
-    "id": "supportiq_ghost_alert",
-    "name": "SupportIQ: Ghost Ticket Surge Alert",
-    "description": "Pre-emptive alert when a ticket surge is detected and correlated with a deployment. Sends alerts to support team and engineering channel with a draft response template.",
-    "trigger": {
-        "type": "webhook",
-        "config": {
-            "method": "POST",
-            "path": "/supportiq/ghost-alert",
-        }
-    },
-    "steps": [
-        {
-            "id": "alert_support_team",
-            "type": "http_request",
+@lru_cache(maxsize=None)
+def _ghost_alert() -> dict:
+    return {
+        "id": "supportiq_ghost_alert",
+        "name": "SupportIQ: Ghost Ticket Surge Alert",
+        "description": "Pre-emptive alert when a ticket surge is detected and correlated with a deployment. Sends alerts to support team and engineering channel with a draft response template.",
+        "trigger": {
+            "type": "webhook",
             "config": {
-                "url": SLACK_WEBHOOK_URL,
                 "method": "POST",
-                "body": {
-                    "channel": SLACK_ALERTS_CHANNEL,
-                    "blocks": [
-                        {
-                            "type": "header",
-                            "text": {"type": "plain_text", "text": "🚨 Ghost Ticket Alert — Surge Detected"}
-                        },
+                "path": "/supportiq/ghost-alert",
+            }
+        },
+        "steps": [
+            # Both channel alerts go out in one step: chat.postMessage (bot token,
+            # explicit channel) once per message, fanned out in parallel
+            {
+                "id": "alert_channels",
+                "type": "foreach",
+                "config": {
+                    "parallel": True,
+                    "items": [
                         {
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": "*Category:* `{{ctx.body.category}}`\n*Current rate:* {{ctx.body.current_hourly_rate}} tickets/hr ({{ctx.body.sigma_level}}σ above baseline)\n*Likely cause:* Deployment `{{ctx.body.deployment_id}}` ({{ctx.body.service}}) at {{ctx.body.deployed_at}}"
-                            }
+                            "channel": _env("SLACK_ALERTS_CHANNEL"),
+                            "blocks": [
+                                {
+                                    "type": "header",
+                                    "text": {**_PLAIN_TEXT, "text": "🚨 Ghost Ticket Alert — Surge Detected"}
+                                },
+                                {
+                                    "type": "section",
+                                    "text": {
+                                        **_MRKDWN,
+                                        "text": "*Category:* `{{ctx.body.category}}`\n*Current rate:* {{ctx.body.current_hourly_rate}} tickets/hr ({{ctx.body.sigma_level}}σ above baseline)\n*Likely cause:* Deployment `{{ctx.body.deployment_id}}` ({{ctx.body.service}}) at {{ctx.body.deployed_at}}"
+                                    }
+                                },
+                                {
+                                    "type": "section",
+                                    "text": {
+                                        **_MRKDWN,
+                                        "text": "*📋 Draft Response Template (1-click copy):*\n```{{ctx.body.draft_template}}```"
+                                    }
+                                },
+                                {
+                                    "type": "context",
+                                    "elements": [{**_MRKDWN, "text": "_SupportIQ detected this surge before it hit your queue. No action needed — I'm monitoring._"}]
+                                }
+                            ]
                         },
                         {
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": "*📋 Draft Response Template (1-click copy):*\n```{{ctx.body.draft_template}}```"
-                            }
+                            "channel": _env("SLACK_ENGINEERING_CHANNEL"),
+                            "text": "⚠️ *SupportIQ Deployment Correlation Alert*\nDeployment `{{ctx.body.deployment_id}}` of `{{ctx.body.service}}` appears to be causing a support surge in the `{{ctx.body.category}}` category.\n*{{ctx.body.current_count}} tickets in the last {{ctx.body.window_minutes}} minutes* ({{ctx.body.sigma_level}}σ above baseline).\nPlease review and consider rollback if needed. Rollback available: {{ctx.body.rollback_available}}"
                         },
-                        {
-                            "type": "context",
-                            "elements": [{"type": "mrkdwn", "text": "_SupportIQ detected this surge before it hit your queue. No action needed — I'm monitoring._"}]
+                    ],
+                    "step": {
+                        "type": "http_request",
+                        "config": {
+                            "url": SLACK_POST_MESSAGE_URL,
+                            "method": "POST",
+                            "headers": {
+                                "Authorization": f"Bearer {_env('SLACK_BOT_TOKEN')}",
+                                "Content-Type": "application/json; charset=utf-8",
+                            },
+                            "body": "{{item}}",
                         }
-                    ]
-                }
-            }
-        },
-        {
-            "id": "alert_engineering",
-            "type": "http_request",
-            "config": {
-                "url": SLACK_WEBHOOK_URL,
-                "method": "POST",
-                "body": {
-                    "channel": SLACK_ENGINEERING_CHANNEL,
-                    "text": "⚠️ *SupportIQ Deployment Correlation Alert*\nDeployment `{{ctx.body.deployment_id}}` of `{{ctx.body.service}}` appears to be causing a support surge in the `{{ctx.body.category}}` category.\n*{{ctx.body.current_count}} tickets in the last {{ctx.body.window_minutes}} minutes* ({{ctx.body.sigma_level}}σ above baseline).\nPlease review and consider rollback if needed. Rollback available: {{ctx.body.rollback_available}}"
+                    }
                 }
-            }
-        },
-        {
-            "id": "log_ghost_ticket",
-            "type": "elasticsearch_index",
-            "config": {
-                "index": "agent-traces",
-                "document": {
-                    "trace_id": "ghost-{{ctx.body.category}}-{{now}}",
-                    "timestamp": "{{now}}",
-                    "agent_name": "analyst",
-                    "action": "ghost_ticket_alert",
-                    "output_summary": "Surge detected in {{ctx.body.category}}, correlated with deployment {{ctx.body.deployment_id}}",
-                    "decision": "pre_emptive_alert",
+            },
+            {
+                "id": "log_ghost_ticket",
+                "type": "elasticsearch_index",
+                "config": {
+                    "index": "agent-traces",
+                    "document": {
+                        "trace_id": "ghost-{{ctx.body.category}}-{{now}}",
+                        "timestamp": "{{now}}",
+                        "agent_name": "analyst",
+                        "action": "ghost_ticket_alert",
+                        "output_summary": "Surge detected in {{ctx.body.category}}, correlated with deployment {{ctx.body.deployment_id}}",
+                        "decision": "pre_emptive_alert",
+                    }
                 }
             }
-        }
-    ]
-}
+        ]
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -255,79 +379,81 @@ WORKFLOW_GHOST_ALERT = {
 # Action: Post draft KB article to Slack with 1-click approve button
 # ─────────────────────────────────────────────────────────────────────────────
 
-WORKFLOW_KB_DRAFT = {
-    "id": "supportiq_kb_draft",
-    "name": "SupportIQ: KB Draft for Review",
-    "description": "Posts auto-generated KB article drafts to Slack for 1-click human approval. On approval, publishes the article to the knowledge base.",
-    "trigger": {
-        "type": "webhook",
-        "config": {
-            "method": "POST",
-            "path": "/supportiq/kb-draft",
-        }
-    },
-    "steps": [
-        {
-            "id": "index_draft",
-            "type": "elasticsearch_index",
+@lru_cache(maxsize=None)
+def _kb_draft() -> dict:
+    return {
+        "id": "supportiq_kb_draft",
+        "name": "SupportIQ: KB Draft for Review",
+        "description": "Posts auto-generated KB article drafts to Slack for 1-click human approval. On approval, publishes the article to the knowledge base.",
+        "trigger": {
+            "type": "webhook",
             "config": {
-                "index": "knowledge-base",
-                "document": {
-                    "article_id": "DRAFT-{{ctx.body.category}}-{{now}}",
-                    "created_at": "{{now}}",
-                    "updated_at": "{{now}}",
-                    "category": "{{ctx.body.category}}",
-                    "title": "{{ctx.body.title}}",
-                    "content": "{{ctx.body.content}}",
-                    "draft": True,
-                    "draft_source_ticket_ids": "{{ctx.body.source_ticket_ids}}",
-                }
+                "method": "POST",
+                "path": "/supportiq/kb-draft",
             }
         },
-        {
-            "id": "post_to_slack",
-            "type": "http_request",
-            "config": {
-                "url": SLACK_WEBHOOK_URL,
-                "method": "POST",
-                "body": {
-                    "channel": SLACK_SUPPORT_CHANNEL,
-                    "blocks": [
-                        {
-                            "type": "header",
-                            "text": {"type": "plain_text", "text": "📝 New KB Article Draft — Review Needed"}
-                        },
-                        {
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": "*Category:* `{{ctx.body.category}}`\n*Title:* {{ctx.body.title}}\n*Based on:* {{ctx.body.ticket_count}} recent tickets with no KB coverage\n\n{{ctx.body.content_preview}}"
+        "steps": [
+            {
+                "id": "index_draft",
+                "type": "elasticsearch_index",
+                "config": {
+                    "index": "knowledge-base",
+                    "document": {
+                        "article_id": "DRAFT-{{ctx.body.category}}-{{now}}",
+                        "created_at": "{{now}}",
+                        "updated_at": "{{now}}",
+                        "category": "{{ctx.body.category}}",
+                        "title": "{{ctx.body.title}}",
+                        "content": "{{ctx.body.content}}",
+                        "draft": True,
+                        "draft_source_ticket_ids": "{{ctx.body.source_ticket_ids}}",
+                    }
+                }
+            },
+            {
+                "id": "post_to_slack",
+                "type": "http_request",
+                "config": {
+                    "url": _env("SLACK_WEBHOOK_URL"),
+                    "method": "POST",
+                    "body": {
+                        "channel": _env("SLACK_SUPPORT_CHANNEL"),
+                        "blocks": [
+                            {
+                                "type": "header",
+                                "text": {**_PLAIN_TEXT, "text": "📝 New KB Article Draft — Review Needed"}
+                            },
+                            {
+                                "type": "section",
+                                "text": {
+                                    **_MRKDWN,
+                                    "text": "*Category:* `{{ctx.body.category}}`\n*Title:* {{ctx.body.title}}\n*Based on:* {{ctx.body.ticket_count}} recent tickets with no KB coverage\n\n{{ctx.body.content_preview}}"
+                                }
+                            },
+                            {
+                                "type": "actions",
+                                "elements": [
+                                    {
+                                        "type": "button",
+                                        "text": {**_PLAIN_TEXT, "text": "✅ Approve & Publish"},
+                                        "style": "primary",
+                                        "value": "{{ctx.body.article_id}}",
+                                        "action_id": "kb_approve",
+                                    },
+                                    {
+                                        "type": "button",
+                                        "text": {**_PLAIN_TEXT, "text": "✏️ Edit First"},
+                                        "value": "{{ctx.body.article_id}}",
+                                        "action_id": "kb_edit",
+                                    },
+                                ]
                             }
-                        },
-                        {
-                            "type": "actions",
-                            "elements": [
-                                {
-                                    "type": "button",
-                                    "text": {"type": "plain_text", "text": "✅ Approve & Publish"},
-                                    "style": "primary",
-                                    "value": "{{ctx.body.article_id}}",
-                                    "action_id": "kb_approve",
-                                },
-                                {
-                                    "type": "button",
-                                    "text": {"type": "plain_text", "text": "✏️ Edit First"},
-                                    "value": "{{ctx.body.article_id}}",
-                                    "action_id": "kb_edit",
-                                },
-                            ]
-                        }
-                    ]
+                        ]
+                    }
                 }
             }
-        }
-    ]
-}
+        ]
+    }
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -336,71 +462,259 @@ WORKFLOW_KB_DRAFT = {
 # Action: Write feedback to Elasticsearch for RLHF-lite training signal
 # ─────────────────────────────────────────────────────────────────────────────
 
-WORKFLOW_RECORD_FEEDBACK = {
-    "id": "supportiq_record_feedback",
-    "name": "SupportIQ: Record Human Feedback",
-    "description": "Captures 👍/👎 reactions on resolution messages in Slack and writes them to Elasticsearch. Powers the weekly RLHF-lite quality improvement cycle.",
-    "trigger": {
-        "type": "webhook",
-        "config": {
-            "method": "POST",
-            "path": "/supportiq/feedback",
-        }
-    },
-    "steps": [
-        {
-            "id": "map_reaction_to_score",
-            "type": "script",
-            "config": {
-                "language": "painless",
-                "source": """
-                    def reaction = ctx.body.reaction;
-                    if (reaction == '+1' || reaction == 'white_check_mark' || reaction == 'thumbsup') {
-                        ctx.score = 1;
-                    } else if (reaction == '-1' || reaction == 'thumbsdown' || reaction == 'x') {
-                        ctx.score = -1;
-                    } else {
-                        ctx.score = 0;
-                    }
-                """
-            }
-        },
-        {
-            "id": "index_feedback",
-            "type": "elasticsearch_index",
+@lru_cache(maxsize=None)
+def _record_feedback() -> dict:
+    return {
+        "id": "supportiq_record_feedback",
+        "name": "SupportIQ: Record Human Feedback",
+        "description": "Captures 👍/👎 reactions on resolution messages in Slack and writes them to Elasticsearch. Powers the weekly RLHF-lite quality improvement cycle.",
+        "trigger": {
+            "type": "webhook",
             "config": {
-                "index": "feedback",
-                "document": {
-                    "feedback_id": "FB-{{ctx.body.ticket_id}}-{{now}}",
-                    "ticket_id": "{{ctx.body.ticket_id}}",
-                    "timestamp": "{{now}}",
-                    "score": "{{score}}",
-                    "agent_id": "{{ctx.body.slack_user_id}}",
-                    "channel": "slack",
-                    "category": "{{ctx.body.category}}",
-                }
+                "method": "POST",
+                "path": "/supportiq/feedback",
             }
         },
-        {
-            "id": "update_ticket_feedback",
-            "type": "elasticsearch_update",
-            "config": {
-                "index": "support-tickets",
-                "query": {"term": {"ticket_id": "{{ctx.body.ticket_id}}"}},
-                "update": {
-                    "feedback_score": "{{score}}",
-                    "feedback_agent_id": "{{ctx.body.slack_user_id}}",
-                }
-            }
-        }
-    ]
+        "steps": [
+            # Feedback document + ticket feedback fields in one _bulk request. The
+            # reaction → score lookup happens in Elasticsearch: the feedback_score
+            # ingest pipeline for the feedback doc, a constant-source update script
+            # (compiled once, cached) for the ticket — no per-event workflow script.
+            _bulk_step("write_feedback", [
+                (
+                    {"index": {"_index": "feedback", "pipeline": FEEDBACK_PIPELINE}},
+                    {
+                        "feedback_id": "FB-{{ctx.body.ticket_id}}-{{now}}",
+                        "ticket_id": "{{ctx.body.ticket_id}}",
+                        "timestamp": "{{now}}",
+                        "reaction": "{{ctx.body.reaction}}",
+                        "agent_id": "{{ctx.body.slack_user_id}}",
+                        "channel": "slack",
+                        "category": "{{ctx.body.category}}",
+                    },
+                ),
+                (
+                    {"update": {"_index": "support-tickets", "_id": "{{ctx.body.ticket_id}}"}},
+                    {"script": {
+                        "lang": "painless",
+                        "source": "ctx._source.feedback_score = params.m.getOrDefault(params.reaction, 0); "
+                                  "ctx._source.feedback_agent_id = params.agent;",
+                        "params": {
+                            "m": dict(REACTION_SCORES),
+                            "reaction": "{{ctx.body.reaction}}",
+                            "agent": "{{ctx.body.slack_user_id}}",
+                        },
+                    }},
+                ),
+            ]),
+        ]
+    }
+
+
+# Factory behind each public WORKFLOW_* name, in registration order. A workflow's
+# dict is only built (once — lru_cache) the first time it is actually asked for.
+_WORKFLOW_FACTORIES = {
+    "WORKFLOW_TICKET_INTAKE": _ticket_intake,
+    "WORKFLOW_CRM_UPDATE": _crm_update,
+    "WORKFLOW_GHOST_ALERT": _ghost_alert,
+    "WORKFLOW_KB_DRAFT": _kb_draft,
+    "WORKFLOW_RECORD_FEEDBACK": _record_feedback,
 }
 
 
-ALL_WORKFLOWS = [
-    WORKFLOW_TICKET_INTAKE,
-    WORKFLOW_CRM_UPDATE,
-    WORKFLOW_GHOST_ALERT,
-    WORKFLOW_KB_DRAFT,
-    WORKFLOW_RECORD_FEEDBACK,
-]
+def __getattr__(name: str):
+    """Resolve WORKFLOW_*, ALL_WORKFLOWS and the ENV_DEFAULTS settings lazily on
+    first access (PEP 562)."""
+    if name in _WORKFLOW_FACTORIES:
+        return _WORKFLOW_FACTORIES[name]()
+    if name == "ALL_WORKFLOWS":
+        return [factory() for factory in _WORKFLOW_FACTORIES.values()]
+    if name in ENV_DEFAULTS:
+        return _env(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Request validation
+# The ctx.body fields each webhook trigger reads, with the JSON types accepted
+# for them. Each schema is compiled once into a flat tuple of checks, so a
+# request is validated with a straight pass over its fields instead of a
+# generic schema walk.
+# ─────────────────────────────────────────────────────────────────────────────
+
+_NUMBER = (int, float)
+_NUMBER_OR_TEXT = (int, float, str)   # surge stats fall back to "?" when unknown
+# Fields the pipeline copies from agent output may arrive as JSON null
+_NONE = type(None)
+_OPTIONAL_TEXT = (str, _NONE)
+
+REQUEST_SCHEMAS = {
+    "supportiq_ticket_intake": {
+        "title": str, "description": str, "customer_id": str, "category": str,
+    },
+    "supportiq_crm_update": {
+        "ticket_id": str, "resolution_text": _OPTIONAL_TEXT, "resolved_by": str,
+        "confidence": (*_NUMBER, _NONE), "is_auto_resolved": bool,
+    },
+    "supportiq_ghost_alert": {
+        "category": _OPTIONAL_TEXT, "current_hourly_rate": (*_NUMBER_OR_TEXT, _NONE),
+        "sigma_level": (*_NUMBER_OR_TEXT, _NONE), "current_count": (*_NUMBER_OR_TEXT, _NONE),
+        "window_minutes": _NUMBER, "deployment_id": _OPTIONAL_TEXT, "service": _OPTIONAL_TEXT,
+        "deployed_at": _OPTIONAL_TEXT, "rollback_available": (bool, _NONE), "draft_template": str,
+    },
+    "supportiq_kb_draft": {
+        "category": str, "title": str, "content": str, "content_preview": str,
+        "article_id": str, "ticket_count": _NUMBER, "source_ticket_ids": (list, str),
+    },
+    "supportiq_record_feedback": {
+        "ticket_id": str, "reaction": str, "slack_user_id": str, "category": _OPTIONAL_TEXT,
+    },
+}
+
+
+def _compile_validator(workflow_id: str, schema: dict):
+    checks = tuple(schema.items())
+
+    def validate(body: dict) -> dict:
+        if not isinstance(body, dict):
+            raise ValueError(f"{workflow_id}: request body must be a JSON object")
+        for field, types in checks:
+            if field not in body:
+                raise ValueError(f"{workflow_id}: missing field '{field}'")
+            if not isinstance(body[field], types):
+                raise ValueError(f"{workflow_id}: field '{field}' has type {type(body[field]).__name__}")
+        return body
+
+    return validate
+
+
+_VALIDATORS = {wf_id: _compile_validator(wf_id, schema) for wf_id, schema in REQUEST_SCHEMAS.items()}
+
+
+def validate_request(workflow_id: str, body: dict) -> dict:
+    """Check a webhook body against its workflow's schema; raises ValueError, returns the body."""
+    return _VALIDATORS[workflow_id](body)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# HTTP
+# One pooled keep-alive session for the Kibana / Elasticsearch calls below.
+# ─────────────────────────────────────────────────────────────────────────────
+
+HTTP_TIMEOUT = (3, 15)   # (connect, read) seconds
+
+SESSION = requests.Session()
+# Bodies are pre-encoded with _dumps and sent as data=, so the type is set once here
+SESSION.headers["Content-Type"] = "application/json; charset=utf-8"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+))
+
+# Elasticsearch and Kibana accept gzip request bodies, so bodies above this size
+# are compressed for them
+GZIP_MIN_BYTES = 1024
+
+
+def _gzip_body(body: bytes, headers: dict) -> dict:
+    """Request kwargs for a JSON body — gzipped with Content-Encoding when large."""
+    if len(body) > GZIP_MIN_BYTES:
+        return {"data": gzip.compress(body, compresslevel=1), "headers": {**headers, "Content-Encoding": "gzip"}}
+    return {"data": body, "headers": headers}
+
+
+def gather(*calls) -> list:
+    """Run zero-argument callables concurrently; results come back in call order."""
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = [pool.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registration
+# A workflow is only PUT when the definition Kibana currently stores differs from
+# ours. 04_workflows.py registers the same ids, so the comparison is against
+# Kibana itself (one concurrent GET per workflow), never a local record that a
+# push from elsewhere would leave stale. force=True skips the check.
+# ─────────────────────────────────────────────────────────────────────────────
+
+@cache
+def _serialized_workflows() -> MappingProxyType:
+    """Workflow id → its encoded request body, serialized once."""
+    return MappingProxyType({
+        workflow["id"]: _dumps(workflow)
+        for workflow in (factory() for factory in _WORKFLOW_FACTORIES.values())
+    })
+
+
+def _workflow_digest(workflow: dict) -> str:
+    """Digest of a definition, independent of key order and encoder."""
+    canonical = json.dumps(workflow, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _stored_digest(workflow: dict, session: requests.Session):
+    """Digest of the fields we define, as Kibana stores them now — None when it has no such workflow."""
+    resp = session.get(
+        f"{_env('KIBANA_URL')}/api/workflows/{workflow['id']}",
+        headers=_kibana_headers(),
+        timeout=HTTP_TIMEOUT,
+    )
+    if resp.status_code != 200:
+        return None
+    stored = json.loads(resp.content)
+    return _workflow_digest({key: stored.get(key) for key in workflow})
+
+
+def register_workflow(wf_id: str, session: requests.Session = None) -> requests.Response:
+    """PUT one workflow's pre-serialized definition to Kibana."""
+    session = session or SESSION
+    return session.put(
+        f"{_env('KIBANA_URL')}/api/workflows/{wf_id}",
+        timeout=HTTP_TIMEOUT,
+        **_gzip_body(_serialized_workflows()[wf_id], _kibana_headers()),
+    )
+
+
+def put_feedback_pipeline(session: requests.Session = None):
+    """Install the ingest pipeline record_feedback writes through (idempotent PUT)."""
+    session = session or SESSION
+    resp = session.put(
+        f"{_env('ELASTIC_URL')}/_ingest/pipeline/{FEEDBACK_PIPELINE}",
+        timeout=HTTP_TIMEOUT,
+        **_gzip_body(_dumps(FEEDBACK_PIPELINE_BODY), {"Authorization": f"ApiKey {_env('ELASTIC_API_KEY')}"}),
+    )
+    if resp.status_code != 200:
+        print(f"  ❌  Failed to install pipeline '{FEEDBACK_PIPELINE}': {resp.status_code} — {resp.text[:200]}")
+
+
+def register_workflows(session: requests.Session = None, force: bool = False) -> list:
+    """Upsert every workflow whose definition in Kibana differs from ours (every
+    workflow when force is set). Returns the ids that were pushed."""
+    session = session or SESSION
+    put_feedback_pipeline(session)
+    workflows = [factory() for factory in _WORKFLOW_FACTORIES.values()]
+
+    if force:
+        changed = [workflow["id"] for workflow in workflows]
+    else:
+        stored = gather(*(lambda workflow=workflow: _stored_digest(workflow, session) for workflow in workflows))
+        changed = [
+            workflow["id"] for workflow, digest in zip(workflows, stored)
+            if digest != _workflow_digest(workflow)
+        ]
+
+    # The PUTs are independent — all of them are in flight at once on the pooled
+    # session, so pushing every workflow costs about one round-trip
+    responses = gather(*(lambda wf_id=wf_id: register_workflow(wf_id, session) for wf_id in changed))
+
+    pushed = []
+    for wf_id, resp in zip(changed, responses):
+        if resp.status_code in (200, 201):
+            pushed.append(wf_id)
+        else:
+            print(f"  ❌  Failed '{wf_id}': {resp.status_code} — {resp.text[:200]}")
+    return pushed